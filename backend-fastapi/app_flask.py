@@ -1,55 +1,208 @@
 from flask import Flask, request, jsonify, send_from_directory
+from flask.json.provider import JSONProvider, DefaultJSONProvider
 from flask_cors import CORS
+import orjson
 import os
+import atexit
+import hashlib
+import asyncio
 import uuid
+import itertools
 import json
-from datetime import datetime
-from threading import Thread
+import multiprocessing
+from datetime import datetime, timezone
+from pathlib import Path
+from threading import Thread, Lock
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import time
+import traceback
 from werkzeug.utils import secure_filename
 from services.supabase_service import supabase_service
-from services.content_extractor import extract_content_from_file, extract_content_from_url
+from services.content_extractor import (
+    extract_content_from_file_sync, extract_content_from_url, close_http, run_blocking,
+    PDF_PARALLEL_MIN_PAGES, pdf_page_count, read_pdf_text_parallel, smart_content_parsing_sync,
+    EXTRACTION_CACHE_ENABLED, get_cached_extraction, cache_extraction, extraction_cache_stats
+)
+from services.ai_processor import classify_content_blocks, embedding_batcher, generate_playbook_suggestions
 
-app = Flask(__name__)
+class ORJSONProvider(JSONProvider):
+    """JSON provider backed by orjson for jsonify, dict responses and request.get_json"""
+    
+    option = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=DefaultJSONProvider.default, option=self.option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=DefaultJSONProvider.default, option=self.option)
+        return self._app.response_class(body, mimetype="application/json")
+
+class ORJSONFlask(Flask):
+    json_provider_class = ORJSONProvider
+
+app = ORJSONFlask(__name__)
 CORS(app)
 
 # Configuration
 UPLOAD_DIR = os.getenv("UPLOAD_DIR", "./uploads")
 MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB
-ALLOWED_EXTENSIONS = {".pdf", ".txt", ".md", ".docx"}
+MAX_REQUEST_SIZE = MAX_FILE_SIZE + 64 * 1024  # room for multipart boundaries and headers
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+UPLOAD_WRITE_BUFFER = 4 * 1024 * 1024  # 4MB
+ALLOWED_EXTENSIONS = frozenset({"pdf", "txt", "md", "docx"})
+BG_WORKERS = int(os.getenv("BG_WORKERS", "8"))
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(os.cpu_count() or 1)))
+# Reuse earlier results for byte-identical uploads. Needs the content_sha column first:
+#   ALTER TABLE playbook_files ADD COLUMN IF NOT EXISTS content_sha TEXT;
+#   CREATE INDEX IF NOT EXISTS idx_playbook_files_content_sha ON playbook_files(content_sha);
+DEDUPE_BY_SHA = os.getenv("DEDUPE_BY_SHA", "false").lower() == "true"
 
 # Ensure upload directory exists
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-def allowed_file(filename):
-    return '.' in filename and \
-           os.path.splitext(filename)[1].lower() in ALLOWED_EXTENSIONS
+# Shared event loop for background coroutines, kept alive for the app lifetime
+APP_LOOP = asyncio.new_event_loop()
+Thread(target=APP_LOOP.run_forever, name="app-loop", daemon=True).start()
+
+# Bounded pool for background upload/URL processing
+EXECUTOR = ThreadPoolExecutor(max_workers=BG_WORKERS, thread_name_prefix="bg-worker")
+
+# Process pool for CPU-bound file parsing (PDF/DOCX), created at startup. Workers are spawned
+# rather than forked, so they never inherit locks held by the loop, batcher or executor threads.
+CPU_POOL = ProcessPoolExecutor(max_workers=CPU_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+def run_async(coro):
+    """Run a coroutine on the shared background loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, APP_LOOP).result()
+
+@atexit.register
+def _close_http_client():
+    """Close the shared URL-fetch client on the loop that owns it"""
+    try:
+        asyncio.run_coroutine_threadsafe(close_http(), APP_LOOP).result(timeout=5)
+    except Exception as e:
+        print(f"⚠️ Failed to close HTTP client: {e}")
+
+# Playbook that new files are attached to, resolved once per process
+_DEFAULT_PLAYBOOK_ID = None
+_pb_lock = Lock()
+
+def get_or_create_default_playbook(default_playbook):
+    """Return the playbook id for new files, hitting Supabase only on first use"""
+    global _DEFAULT_PLAYBOOK_ID
+    if _DEFAULT_PLAYBOOK_ID:
+        return _DEFAULT_PLAYBOOK_ID
+    
+    with _pb_lock:
+        if _DEFAULT_PLAYBOOK_ID:
+            return _DEFAULT_PLAYBOOK_ID
+        
+        playbook_result = supabase_service.get_all_playbooks(limit=1)
+        if playbook_result["success"] and playbook_result["data"]:
+            playbook_id = playbook_result["data"][0]["id"]
+        else:
+            playbook_create_result = supabase_service.create_playbook(default_playbook)
+            if not playbook_create_result["success"]:
+                return None
+            playbook_id = playbook_create_result["data"].get("id")
+        
+        _DEFAULT_PLAYBOOK_ID = playbook_id
+        return playbook_id
+
+def save_upload_stream(stream, file_path, max_size=MAX_FILE_SIZE):
+    """Write an upload stream to disk, returning its size and SHA-256 hex digest.
+    
+    Stops reading as soon as max_size is exceeded; the returned size is then larger than max_size.
+    """
+    digest = hashlib.sha256()
+    file_size = 0
+    with open(file_path, 'wb', buffering=UPLOAD_WRITE_BUFFER) as out:
+        for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b''):
+            file_size += len(chunk)
+            if file_size > max_size:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+    return file_size, digest.hexdigest()
+
+# Dashboard stats are served from memory for STATS_TTL seconds
+STATS_TTL = 5.0
+_stats_cache = {"expires": 0.0, "data": None}
+_stats_lock = Lock()
+
+# (monotonic time, ISO string) of the last formatted timestamp
+_LAST_TS = [float("-inf"), ""]
+
+def now_iso():
+    """Current UTC time as ISO string, re-formatted at most every 100ms"""
+    t = time.monotonic()
+    if t - _LAST_TS[0] > 0.1:
+        _LAST_TS[:] = [t, datetime.now(timezone.utc).isoformat()]
+    return _LAST_TS[1]
 
-def process_upload_background(upload_id, file_path, mime_type):
+def allowed_ext(ext):
+    """Check an already-lowered extension (without the dot)"""
+    return ext in ALLOWED_EXTENSIONS
+
+async def finalize_upload(upload_id, blocks_with_embeddings, all_tags):
+    """Store embeddings while tagging the parent playbook; the two Supabase paths are independent"""
+    
+    async def tag_playbook():
+        # First get the playbook ID associated with this file
+        file_data = await run_blocking(supabase_service.get_playbook_file_by_id, upload_id)
+        if file_data.get("success") and file_data.get("data"):
+            playbook_id = file_data["data"].get("playbook_id")
+            if playbook_id:
+                await run_blocking(supabase_service.update_playbook_tags, playbook_id, list(all_tags))
+    
+    await asyncio.gather(
+        run_blocking(supabase_service.store_embeddings, upload_id, blocks_with_embeddings),
+        tag_playbook()
+    )
+
+def process_upload_background(upload_id, file_path, mime_type, content_sha=None):
     """Background task to process uploaded file"""
     try:
         # Update status to processing
         # Update status not needed for playbook_files
         # supabase_service.update_upload_status(upload_id, "processing")
         
-        # Extract content
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        extracted_data = loop.run_until_complete(extract_content_from_file(file_path, mime_type))
+        # Extract content in a worker process so PDF/DOCX parsing runs off the web workers;
+        # re-uploads of identical bytes reuse the earlier extraction
+        # content_sha was hashed while the upload streamed to disk, so the file is not read again here
+        cache_key = f"file:{content_sha}:{mime_type}" if EXTRACTION_CACHE_ENABLED and content_sha else None
+        extracted_data = get_cached_extraction(cache_key)
+        if extracted_data is None:
+            raw_text = None
+            if mime_type == "application/pdf":
+                # Large PDFs: extract page ranges on all workers, then parse the joined text.
+                # Errors opening the PDF are wrapped like the extractor's own
+                try:
+                    page_count = pdf_page_count(file_path)
+                    if page_count >= PDF_PARALLEL_MIN_PAGES:
+                        raw_text = read_pdf_text_parallel(file_path, CPU_POOL, CPU_WORKERS, page_count)
+                except Exception as e:
+                    raise Exception(f"Failed to extract from PDF: {str(e)}")
+            
+            if raw_text is not None:
+                extracted_data = CPU_POOL.submit(smart_content_parsing_sync, raw_text, "pdf").result()
+            else:
+                extracted_data = CPU_POOL.submit(extract_content_from_file_sync, file_path, mime_type).result()
+            cache_extraction(cache_key, extracted_data)
         
         # Step 2: Classify blocks into playbook assets using AI
-        from services.ai_processor import classify_content_blocks, generate_embeddings, generate_playbook_suggestions
-        
         print(f"📝 Extracted {len(extracted_data['blocks'])} content blocks")
         
-        # Classify blocks into playbook asset types
+        # Classify blocks into playbook asset types (Gemini requests, so it stays on this thread)
         classified_blocks = classify_content_blocks(extracted_data["blocks"])
         print(f"🏷️ Classified blocks into playbook assets")
         
-        # Step 3: Generate embeddings for each block
-        blocks_with_embeddings = generate_embeddings(classified_blocks)
+        # Step 3: Generate embeddings, batched with blocks from concurrent uploads
+        blocks_with_embeddings = embedding_batcher.embed(classified_blocks)
         print(f"🧠 Generated embeddings for {len(blocks_with_embeddings)} blocks")
         
         # Step 4: Generate playbook structure suggestions
@@ -57,28 +210,16 @@ def process_upload_background(upload_id, file_path, mime_type):
         print(f"📋 Generated playbook structure with {len(playbook_suggestions['sections'])} sections")
         
         # Step 5: Store embeddings and update playbook with tags
-        all_tags = set()
-        for block in blocks_with_embeddings:
-            all_tags.update(block.get("tags", []))
+        all_tags = set(itertools.chain.from_iterable(block.get("tags", ()) for block in blocks_with_embeddings))
         
-        # Store embeddings in database
-        supabase_service.store_embeddings(upload_id, blocks_with_embeddings)
-        
-        # Update playbook with extracted tags
-        # First get the playbook ID associated with this file
-        file_data = supabase_service.get_playbook_file_by_id(upload_id)
-        if file_data.get("success") and file_data.get("data"):
-            playbook_id = file_data["data"].get("playbook_id")
-            if playbook_id:
-                supabase_service.update_playbook_tags(playbook_id, list(all_tags))
+        # Store embeddings and tag the playbook concurrently
+        run_async(finalize_upload(upload_id, blocks_with_embeddings, all_tags))
         
         print(f"💾 Stored {len(blocks_with_embeddings)} embeddings and {len(all_tags)} tags")
         
         # Update upload status
         supabase_service.update_upload_status(upload_id, "completed")
         
-        loop.close()
-        
     except Exception as e:
         # Update status to failed
         supabase_service.update_upload_status(upload_id, "failed", str(e))
@@ -91,11 +232,7 @@ def process_url_background(upload_id, url):
         # supabase_service.update_upload_status(upload_id, "processing")
         
         # Extract content from URL
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        extracted_data = loop.run_until_complete(extract_content_from_url(url))
+        extracted_data = run_async(extract_content_from_url(url))
         
         # For demo, we'll just store the blocks as-is (without AI processing)
         processed_blocks = extracted_data["blocks"]
@@ -107,8 +244,6 @@ def process_url_background(upload_id, url):
         # Update upload status
         supabase_service.update_upload_status(upload_id, "completed")
         
-        loop.close()
-        
     except Exception as e:
         # Update status to failed
         supabase_service.update_upload_status(upload_id, "failed", str(e))
@@ -119,12 +254,17 @@ def root():
 
 @app.route('/health')
 def health_check():
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+    # Hit/miss counts of this web process's file-level extraction cache (the CPU_POOL workers keep none)
+    return {"status": "healthy", "timestamp": now_iso(), "extraction_cache": extraction_cache_stats}
 
 @app.route('/api/upload/file', methods=['POST'])
 def upload_file():
     """Upload and process a file"""
     
+    # Reject oversize bodies from the declared length, before the multipart body is parsed
+    if request.content_length is not None and request.content_length > MAX_REQUEST_SIZE:
+        return jsonify({"error": "File size exceeds 10MB limit"}), 413
+    
     # Check if file is in request
     if 'file' not in request.files:
         return jsonify({"error": "No file provided"}), 400
@@ -133,7 +273,10 @@ def upload_file():
     if file.filename == '':
         return jsonify({"error": "No file selected"}), 400
     
-    if not allowed_file(file.filename):
+    # Parse the extension once and reuse it for validation and file_type
+    _, dot, ext = file.filename.rpartition('.')
+    ext = ext.lower() if dot else ''
+    if not allowed_ext(ext):
         return jsonify({
             "error": f"File type not allowed. Supported: {', '.join(ALLOWED_EXTENSIONS)}"
         }), 400
@@ -145,12 +288,26 @@ def upload_file():
         unique_filename = f"{upload_id}_{filename}"
         file_path = os.path.join(UPLOAD_DIR, unique_filename)
         
-        file.save(file_path)
-        file_size = os.path.getsize(file_path)
+        # Stream straight to disk, hashing as we go
+        file_size, content_sha = save_upload_stream(file.stream, file_path)
         
         if file_size > MAX_FILE_SIZE:
             os.remove(file_path)
-            return jsonify({"error": "File size exceeds 10MB limit"}), 400
+            return jsonify({"error": "File size exceeds 10MB limit"}), 413
+        
+        # Identical file already processed - reuse it instead of re-running the AI pipeline
+        duplicate_result = supabase_service.find_playbook_file_by_sha(content_sha) if DEDUPE_BY_SHA else None
+        if duplicate_result and duplicate_result["success"] and duplicate_result["data"]:
+            os.remove(file_path)
+            existing_id = duplicate_result["data"]["id"]
+            return jsonify({
+                "success": True,
+                "upload_id": existing_id,
+                "message": "File already uploaded, reusing existing processing results",
+                "redirect_url": f"/playbook/{existing_id}",
+                "file_data": duplicate_result["data"],
+                "duplicate": True
+            })
         
         # Upload to Supabase Storage
         upload_result = supabase_service.upload_file(file_path, filename)
@@ -161,30 +318,24 @@ def upload_file():
         
         # Create playbook file record in Supabase database
         # First, create a default playbook if none exists
-        playbook_result = supabase_service.get_all_playbooks(limit=1)
-        if playbook_result["success"] and playbook_result["data"]:
-            playbook_id = playbook_result["data"][0]["id"]
-        else:
-            # Create a default playbook for uploaded files
-            default_playbook = {
-                "title": "Uploaded Files Playbook",
-                "description": "Default playbook for uploaded files",
-                "tags": ["uploads"],
-                "stage": "draft"
-            }
-            playbook_create_result = supabase_service.create_playbook(default_playbook)
-            if playbook_create_result["success"]:
-                playbook_id = playbook_create_result["data"]["id"]
-            else:
-                return jsonify({"error": "Failed to create playbook for file"}), 500
+        playbook_id = get_or_create_default_playbook({
+            "title": "Uploaded Files Playbook",
+            "description": "Default playbook for uploaded files",
+            "tags": ["uploads"],
+            "stage": "draft"
+        })
+        if not playbook_id:
+            return jsonify({"error": "Failed to create playbook for file"}), 500
 
         file_data = {
             "id": upload_id,
             "file_name": filename,
-            "file_type": os.path.splitext(filename)[1].lower().replace('.', '') or 'txt',
+            "file_type": ext or 'txt',
             "storage_path": upload_result["path"],
             "playbook_id": playbook_id
         }
+        if DEDUPE_BY_SHA:
+            file_data["content_sha"] = content_sha
         
         db_result = supabase_service.create_playbook_file(file_data)
         
@@ -193,9 +344,7 @@ def upload_file():
             return jsonify({"error": f"Database record creation failed: {db_result['error']}"}), 500
         
         # Start background processing
-        thread = Thread(target=process_upload_background, args=(upload_id, file_path, file.content_type))
-        thread.daemon = True
-        thread.start()
+        EXECUTOR.submit(process_upload_background, upload_id, file_path, file.content_type, content_sha)
         
         return jsonify({
             "success": True,
@@ -206,9 +355,8 @@ def upload_file():
         })
     
     except Exception as e:
-        if 'file_path' in locals() and os.path.exists(file_path):
-            os.remove(file_path)
-        import traceback
+        if 'file_path' in locals():
+            Path(file_path).unlink(missing_ok=True)
         print(f"❌ Upload error: {str(e)}")
         print(f"❌ Full traceback: {traceback.format_exc()}")
         return jsonify({"error": f"Upload failed: {str(e)}", "details": traceback.format_exc()}), 500
@@ -233,25 +381,18 @@ def import_url():
             "source_url": url,
             "original_name": title,
             "status": "uploaded",
-            "created_at": datetime.utcnow().isoformat()
+            "created_at": now_iso()
         }
         
         # Create a default playbook for URL content
-        playbook_result = supabase_service.get_all_playbooks(limit=1)
-        if playbook_result["success"] and playbook_result["data"]:
-            playbook_id = playbook_result["data"][0]["id"]
-        else:
-            default_playbook = {
-                "title": "URL Content Playbook",
-                "description": "Default playbook for URL content",
-                "tags": ["url", "web"],
-                "stage": "draft"
-            }
-            playbook_create_result = supabase_service.create_playbook(default_playbook)
-            if playbook_create_result["success"]:
-                playbook_id = playbook_create_result["data"]["id"]
-            else:
-                return jsonify({"error": "Failed to create playbook for URL"}), 500
+        playbook_id = get_or_create_default_playbook({
+            "title": "URL Content Playbook",
+            "description": "Default playbook for URL content",
+            "tags": ["url", "web"],
+            "stage": "draft"
+        })
+        if not playbook_id:
+            return jsonify({"error": "Failed to create playbook for URL"}), 500
 
         file_data = {
             "id": upload_id,
@@ -267,9 +408,7 @@ def import_url():
             return jsonify({"error": f"Database record creation failed: {db_result['error']}"}), 500
         
         # Start background processing
-        thread = Thread(target=process_url_background, args=(upload_id, url))
-        thread.daemon = True
-        thread.start()
+        EXECUTOR.submit(process_url_background, upload_id, url)
         
         return jsonify({
             "success": True,
@@ -286,7 +425,8 @@ def get_upload_status(upload_id):
     """Get upload status and details"""
     
     try:
-        result = supabase_service.get_playbook_file_by_id(upload_id)
+        # File record and blocks_extracted come back from a single query
+        result = supabase_service.get_playbook_file_with_blockcount(upload_id)
         
         if not result["success"]:
             return jsonify({"error": result["error"]}), 404
@@ -295,16 +435,6 @@ def get_upload_status(upload_id):
         if not upload:
             return jsonify({"error": "Upload not found"}), 404
         
-        # Get blocks count if completed
-        blocks_count = 0
-        # playbook_files don't have status, so always show blocks count as 0
-        # Content blocks not in schema - return empty for now
-        blocks_result = {"success": True, "data": []}
-        if blocks_result["success"]:
-            blocks_count = len(blocks_result["data"])
-        
-        upload["blocks_extracted"] = blocks_count
-        
         return jsonify(upload)
     
     except Exception as e:
@@ -331,23 +461,34 @@ def get_dashboard_stats():
     """Get dashboard statistics"""
     
     try:
-        uploads_result = supabase_service.get_all_playbook_files(limit=100)
+        # Fresh cached stats are served under the lock; the Supabase count itself runs outside it,
+        # so a slow upstream call never queues other dashboard requests (an expiry may fetch twice)
+        with _stats_lock:
+            fresh = _stats_cache["data"] if time.monotonic() < _stats_cache["expires"] else None
+        if fresh is not None:
+            return jsonify(fresh)
         
-        if not uploads_result["success"]:
-            return jsonify({"error": uploads_result["error"]}), 500
+        count_result = supabase_service.count_playbook_files()
         
-        files = uploads_result["data"]
+        if not count_result["success"]:
+            return jsonify({"error": count_result["error"]}), 500
         
-        total_playbooks = len(files)
-        active_projects = len(files)  # All files are considered active since no status field
+        total_playbooks = count_result["data"]
+        active_projects = total_playbooks  # All files are considered active since no status field
         total_size = 0  # file_size not in playbook_files schema
         
-        return jsonify({
+        stats = {
             "total_playbooks": total_playbooks,
             "active_projects": active_projects,
             "total_collaborators": 1,  # Mock for now
             "storage_used": f"{total_size / (1024*1024):.1f} MB"
-        })
+        }
+        
+        with _stats_lock:
+            _stats_cache["data"] = stats
+            _stats_cache["expires"] = time.monotonic() + STATS_TTL
+        
+        return jsonify(stats)
     
     except Exception as e:
         return jsonify({"error": f"Failed to get stats: {str(e)}"}), 500
@@ -368,7 +509,8 @@ def get_recent_playbooks():
         return jsonify({"error": f"Failed to get recent playbooks: {str(e)}"}), 500
 
 if __name__ == "__main__":
-    print("✅ Starting PlaybookOS Flask server...")
+    # Development server only - in production run: gunicorn -c gunicorn.conf.py app_flask:app
+    print("✅ Starting PlaybookOS Flask development server...")
     port = int(os.getenv("FLASK_PORT", 8001))
     host = os.getenv("FLASK_HOST", "0.0.0.0")
     debug = os.getenv("FLASK_DEBUG", "true").lower() == "true"
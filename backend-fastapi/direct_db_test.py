@@ -4,18 +4,22 @@ Direct database test - Insert data directly into Supabase
 """
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import uuid
 from datetime import datetime
 from dotenv import load_dotenv
-import urllib3
-
-# Disable SSL warnings for testing
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # Load environment variables
 load_dotenv()
 
+# Shared session so both requests reuse one pooled, certificate-verified connection.
+# Behind a corporate proxy, point REQUESTS_CA_BUNDLE at its CA instead of disabling verification.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32,
+                                      max_retries=Retry(total=3, backoff_factor=0.2)))
+
 def direct_insert_test():
     """Test direct insertion into Supabase uploads table"""
     
@@ -55,11 +59,12 @@ def direct_insert_test():
         'Accept': 'application/json'
     }
     
+    SESSION.headers.update(headers)
     insert_url = f"{url}/rest/v1/uploads"
     
     try:
         print("📤 Inserting test data...")
-        response = requests.post(insert_url, headers=headers, json=test_data, verify=False)
+        response = SESSION.post(insert_url, json=test_data)
         print(f"Status Code: {response.status_code}")
         
         if response.status_code == 201:
@@ -87,12 +92,14 @@ def verify_insert():
         'Accept': 'application/json'
     }
     
+    SESSION.headers.update(headers)
+    
     # Get all records to verify
     select_url = f"{url}/rest/v1/uploads?select=*"
     
     try:
         print("\n📥 Verifying inserted data...")
-        response = requests.get(select_url, headers=headers, verify=False)
+        response = SESSION.get(select_url)
         
         if response.status_code == 200:
             data = response.json()
@@ -0,0 +1,20 @@
+"""
+Gunicorn settings for serving the Flask API in production:
+
+    gunicorn -c gunicorn.conf.py app_flask:app
+"""
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = f"{os.getenv('FLASK_HOST', '0.0.0.0')}:{os.getenv('FLASK_PORT', '8001')}"
+
+# One process per core; threads cover the I/O-bound Supabase/upload requests
+workers = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Uploads of up to MAX_FILE_SIZE can take a while on slow links
+timeout = 120
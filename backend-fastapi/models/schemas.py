@@ -2,7 +2,7 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
 from uuid import UUID
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class UserRole(str, Enum):
@@ -46,78 +46,19 @@ class EmbeddingType(str, Enum):
     PR = "pr"
 
 
-class UploadStatus(str, Enum):
-    UPLOADED = "uploaded"
-    PROCESSING = "processing"
-    COMPLETED = "completed"
-    FAILED = "failed"
-
-
 # Base Models
 class BaseDBModel(BaseModel):
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
     
     id: UUID
     created_at: datetime
     updated_at: Optional[datetime] = None
 
 
-# Upload Models (for our upload workflow)
-class UploadBase(BaseModel):
-    filename: Optional[str] = None
-    original_name: Optional[str] = None
-    file_path: Optional[str] = None
-    file_size: Optional[int] = None
-    mime_type: Optional[str] = None
-    source_url: Optional[str] = None
-    status: UploadStatus = UploadStatus.UPLOADED
-    error_message: Optional[str] = None
-
-
-class UploadCreate(UploadBase):
-    pass
-
-
-class UploadUpdate(BaseModel):
-    status: Optional[UploadStatus] = None
-    error_message: Optional[str] = None
-    processed_at: Optional[datetime] = None
-
-
-class Upload(BaseDBModel, UploadBase):
-    processed_at: Optional[datetime] = None
-
-
-class UploadResponse(BaseModel):
-    success: bool
-    upload_id: str
-    message: str
-    blocks_extracted: Optional[int] = None
-    redirect_url: Optional[str] = None
-
-
-# Content Block Models
-class ContentBlockBase(BaseModel):
-    upload_id: UUID
-    type: str
-    content: str
-    confidence_score: float = 0.8
-    suggested_asset_type: Optional[str] = None
-
-
-class ContentBlockCreate(ContentBlockBase):
-    pass
-
-
-class ContentBlock(BaseDBModel, ContentBlockBase):
-    pass
-
-
 # User Models
 class UserBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
-    email: str = Field(..., regex=r'^[^@]+@[^@]+\.[^@]+$')
+    email: str = Field(..., pattern=r'^[^@]+@[^@]+\.[^@]+$')
     role: UserRole
     stage: Optional[str] = None
 
@@ -202,8 +143,7 @@ class UploadCreate(BaseModel):
 
 
 class Upload(BaseModel):
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
     
     id: UUID
     filename: Optional[str] = None
@@ -219,6 +159,12 @@ class Upload(BaseModel):
     blocks_extracted: int = 0
 
 
+class UploadUpdate(BaseModel):
+    status: Optional[UploadStatus] = None
+    error_message: Optional[str] = None
+    processed_at: Optional[datetime] = None
+
+
 # Content Block Models
 class ContentBlockType(str, Enum):
     HEADING = "heading"
@@ -248,8 +194,7 @@ class ContentBlockCreate(BaseModel):
 
 
 class ContentBlock(BaseModel):
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
     
     id: UUID
     upload_id: UUID
@@ -270,7 +215,9 @@ class UploadResponse(BaseModel):
 
 
 class URLImportRequest(BaseModel):
-    url: str = Field(..., regex=r'^https?://.+')
+    model_config = ConfigDict(extra='forbid')
+    
+    url: str = Field(..., pattern=r'^https?://.+')
     title: Optional[str] = None
     description: Optional[str] = None
 
@@ -1,10 +1,16 @@
 from typing import Optional, Dict, Any, List
-from uuid import UUID
-from datetime import datetime
+from uuid import UUID, uuid4
+from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, insert, update, delete, text
+from sqlalchemy.sql.elements import TextClause
 from sqlalchemy.dialects.postgresql import JSONB
 from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from collections import OrderedDict
+import threading
+import time
 
 from .database import get_db_session
 from .schemas import (
@@ -15,6 +21,131 @@ from .schemas import (
     PlaybookFile, PlaybookFileCreate
 )
 
+# Batches at or above this size are loaded with COPY instead of a multi-row INSERT
+COPY_THRESHOLD = 100
+CONTENT_BLOCK_COLUMNS = ['id', 'upload_id', 'type', 'content', 'confidence_score',
+                         'suggested_asset_type', 'created_at']
+
+# text() clauses keyed by SQL string, so each query is compiled once per process.
+# Bounded, since UserRepository.update builds its SET list per call
+STMT_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=STMT_CACHE_SIZE)
+def _compiled(query: str) -> TextClause:
+    """text() clause for a SQL string"""
+    return text(query)
+
+
+SQL_ASYNC_COMMIT = "SET LOCAL synchronous_commit = off"
+
+# Hot read queries; kept as constants so their cache keys are stable
+SQL_UPLOAD_BY_ID = """
+SELECT u.*, 
+       (SELECT COUNT(*) FROM content_blocks cb WHERE cb.upload_id = u.id) as blocks_extracted
+FROM uploads u
+WHERE u.id = :upload_id
+"""
+
+# LIMIT is applied before counting, so only the returned uploads are counted
+SQL_RECENT_UPLOADS = """
+WITH recent AS (
+    SELECT * FROM uploads 
+    ORDER BY created_at DESC 
+    LIMIT :limit
+)
+SELECT u.*, 
+       (SELECT COUNT(*) FROM content_blocks cb WHERE cb.upload_id = u.id) as blocks_extracted
+FROM recent u
+ORDER BY u.created_at DESC
+"""
+
+SQL_BLOCKS_BY_UPLOAD = "SELECT * FROM content_blocks WHERE upload_id = :upload_id ORDER BY created_at ASC"
+SQL_CREATE_USER_WITH_PASSWORD = """
+WITH new_user AS (
+    INSERT INTO users (id, name, email, role, stage, created_at, updated_at)
+    VALUES (uuid_generate_v4(), :name, :email, :role, :stage, NOW(), NOW())
+    RETURNING *
+), new_password AS (
+    INSERT INTO user_passwords (id, user_id, password_hash, created_at)
+    SELECT uuid_generate_v4(), id, :password_hash, NOW() FROM new_user
+)
+SELECT * FROM new_user
+"""
+
+# asyncpg-style placeholders: run directly on the driver connection via fetch_row_raw()
+SQL_USER_BY_EMAIL = "SELECT * FROM users WHERE email = $1"
+SQL_USER_BY_ID = "SELECT * FROM users WHERE id = $1"
+SQL_PASSWORD_HASH = "SELECT password_hash FROM user_passwords WHERE user_id = :user_id"
+SQL_DELETE_USER = """
+WITH removed_password AS (
+    DELETE FROM user_passwords WHERE user_id = :user_id
+)
+DELETE FROM users WHERE id = :user_id
+RETURNING id
+"""
+SQL_PLAYBOOK_BY_ID = "SELECT * FROM playbooks WHERE id = :playbook_id"
+SQL_PLAYBOOKS_BY_OWNER = """
+SELECT * FROM playbooks 
+WHERE owner_id = :owner_id 
+ORDER BY updated_at DESC 
+LIMIT :limit
+"""
+
+# One statement text for every batch size: rows are bound as parallel arrays
+SQL_INSERT_CONTENT_BLOCKS = """
+INSERT INTO content_blocks (id, upload_id, type, content, confidence_score, 
+                            suggested_asset_type, created_at)
+SELECT b.id, b.upload_id, b.type, b.content, b.confidence_score, b.suggested_asset_type, NOW()
+FROM unnest($1::uuid[], $2::uuid[], $3::text[], $4::text[], $5::float8[], $6::text[])
+     AS b(id, upload_id, type, content, confidence_score, suggested_asset_type)
+RETURNING *
+"""
+
+# Per-process cache of user rows keyed by ('id', id) and ('email', email).
+# Anything that modifies a user must call invalidate_cached_user().
+USER_CACHE_TTL = 30.0
+USER_CACHE_SIZE = 4096
+_user_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+# Repositories run on more than one thread/loop; OrderedDict reordering is not atomic
+_user_cache_lock = threading.Lock()
+
+
+def _get_cached_user(key: tuple) -> Optional[User]:
+    """Return a cached user that has not expired yet"""
+    with _user_cache_lock:
+        entry = _user_cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            _user_cache.pop(key, None)
+            return None
+        _user_cache.move_to_end(key)
+        return entry[1]
+
+
+def _cache_user(user: User) -> User:
+    """Cache a user under both its id and email, evicting the least recently used"""
+    entry = (time.monotonic() + USER_CACHE_TTL, user)
+    with _user_cache_lock:
+        _user_cache[('id', user.id)] = entry
+        _user_cache[('email', user.email)] = entry
+        while len(_user_cache) > USER_CACHE_SIZE:
+            _user_cache.popitem(last=False)
+    return user
+
+
+def invalidate_cached_user(user_id: Optional[UUID] = None, email: Optional[str] = None):
+    """Drop a user from the cache after it changes"""
+    with _user_cache_lock:
+        cached = _user_cache.pop(('id', user_id), None) if user_id is not None else None
+        if cached is not None:
+            _user_cache.pop(('email', cached[1].email), None)
+        if email is not None:
+            cached = _user_cache.pop(('email', email), None)
+            if cached is not None:
+                _user_cache.pop(('id', cached[1].id), None)
+
 
 class BaseRepository(ABC):
     """Base repository class following Repository pattern"""
@@ -23,8 +154,8 @@ class BaseRepository(ABC):
         self.session = session
     
     async def execute_query(self, query, values: Optional[Dict] = None):
-        """Execute a raw SQL query"""
-        result = await self.session.execute(text(query), values or {})
+        """Execute a raw SQL query, reusing the compiled text() clause"""
+        result = await self.session.execute(_compiled(query), values or {})
         return result
     
     async def fetch_one(self, query, values: Optional[Dict] = None):
@@ -37,6 +168,17 @@ class BaseRepository(ABC):
         result = await self.execute_query(query, values)
         return result.fetchall()
     
+    async def get_driver_connection(self):
+        """The asyncpg connection behind the session's current transaction"""
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        return raw_connection.driver_connection
+    
+    async def fetch_row_raw(self, query: str, *args):
+        """Fetch one asyncpg Record directly, skipping SQLAlchemy compilation and Row wrapping"""
+        driver_connection = await self.get_driver_connection()
+        return await driver_connection.fetchrow(query, *args)
+    
     async def commit(self):
         """Commit transaction"""
         await self.session.commit()
@@ -44,6 +186,24 @@ class BaseRepository(ABC):
     async def rollback(self):
         """Rollback transaction"""
         await self.session.rollback()
+    
+    @asynccontextmanager
+    async def transaction(self):
+        """Group several auto_commit=False writes into one commit (one WAL flush)"""
+        try:
+            yield self
+            await self.commit()
+        except Exception:
+            await self.rollback()
+            raise
+    
+    async def async_commit(self):
+        """Let the current transaction commit without waiting for the WAL flush.
+        
+        Only for re-computable data: a crash can lose the last few commits but never
+        corrupts or reorders them.
+        """
+        await self.execute_query(SQL_ASYNC_COMMIT)
 
 
 class UploadRepository(BaseRepository):
@@ -71,26 +231,14 @@ class UploadRepository(BaseRepository):
         result = await self.fetch_one(query, values)
         await self.commit()
         
-        return Upload(**dict(result._mapping))
+        return Upload.model_construct(**result._mapping)
     
     async def get_by_id(self, upload_id: UUID) -> Optional[Upload]:
         """Get upload by ID"""
-        query = """
-        SELECT u.*, 
-               COALESCE(cb.blocks_count, 0) as blocks_extracted
-        FROM uploads u
-        LEFT JOIN (
-            SELECT upload_id, COUNT(*) as blocks_count 
-            FROM content_blocks 
-            GROUP BY upload_id
-        ) cb ON u.id = cb.upload_id
-        WHERE u.id = :upload_id
-        """
-        
-        result = await self.fetch_one(query, {'upload_id': str(upload_id)})
+        result = await self.fetch_one(SQL_UPLOAD_BY_ID, {'upload_id': upload_id})
         
         if result:
-            return Upload(**dict(result._mapping))
+            return Upload.model_construct(**result._mapping)
         return None
     
     async def update_status(self, upload_id: UUID, status: UploadStatus, 
@@ -106,39 +254,29 @@ class UploadRepository(BaseRepository):
         """
         
         values = {
-            'upload_id': str(upload_id),
+            'upload_id': upload_id,
             'status': status.value,
             'error_message': error_message
         }
         
+        # Intermediate statuses are rewritten by the pipeline; completion stays durable
+        if status == UploadStatus.PROCESSING:
+            await self.async_commit()
         await self.execute_query(query, values)
         await self.commit()
         return True
     
     async def get_recent_uploads(self, limit: int = 10) -> List[Upload]:
         """Get recent uploads"""
-        query = """
-        SELECT u.*, 
-               COALESCE(cb.blocks_count, 0) as blocks_extracted
-        FROM uploads u
-        LEFT JOIN (
-            SELECT upload_id, COUNT(*) as blocks_count 
-            FROM content_blocks 
-            GROUP BY upload_id
-        ) cb ON u.id = cb.upload_id
-        ORDER BY u.created_at DESC
-        LIMIT :limit
-        """
-        
-        results = await self.fetch_all(query, {'limit': limit})
-        return [Upload(**dict(row._mapping)) for row in results]
+        results = await self.fetch_all(SQL_RECENT_UPLOADS, {'limit': limit})
+        return [Upload.model_construct(**row._mapping) for row in results]
 
 
 class ContentBlockRepository(BaseRepository):
     """Repository for content block operations"""
     
-    async def create(self, block_data: ContentBlockCreate) -> ContentBlock:
-        """Create a new content block"""
+    async def create(self, block_data: ContentBlockCreate, auto_commit: bool = True) -> ContentBlock:
+        """Create a new content block; pass auto_commit=False inside transaction()"""
         query = """
         INSERT INTO content_blocks (id, upload_id, type, content, confidence_score, 
                                   suggested_asset_type, created_at)
@@ -148,64 +286,73 @@ class ContentBlockRepository(BaseRepository):
         """
         
         values = {
-            'upload_id': str(block_data.upload_id),
+            'upload_id': block_data.upload_id,
             'type': block_data.type.value,
             'content': block_data.content,
             'confidence_score': block_data.confidence_score,
             'suggested_asset_type': block_data.suggested_asset_type.value
         }
         
+        await self.async_commit()
         result = await self.fetch_one(query, values)
-        await self.commit()
+        if auto_commit:
+            await self.commit()
         
-        return ContentBlock(**dict(result._mapping))
+        return ContentBlock.model_construct(**result._mapping)
     
-    async def create_batch(self, blocks: List[ContentBlockCreate]) -> List[ContentBlock]:
-        """Create multiple content blocks in batch"""
+    async def create_batch(self, blocks: List[ContentBlockCreate], auto_commit: bool = True) -> List[ContentBlock]:
+        """Create multiple content blocks in batch; pass auto_commit=False inside transaction()"""
         if not blocks:
             return []
         
-        # Build batch insert query
-        values_list = []
-        for i, block in enumerate(blocks):
-            values_list.append(f"""
-                (uuid_generate_v4(), :upload_id_{i}, :type_{i}, :content_{i}, 
-                 :confidence_score_{i}, :suggested_asset_type_{i}, NOW())
-            """)
+        if len(blocks) >= COPY_THRESHOLD:
+            return await self._copy_batch(blocks, auto_commit)
         
-        query = f"""
-        INSERT INTO content_blocks (id, upload_id, type, content, confidence_score, 
-                                  suggested_asset_type, created_at)
-        VALUES {', '.join(values_list)}
-        RETURNING *
-        """
+        ids = [uuid4() for _ in blocks]
         
-        # Build parameters
-        params = {}
-        for i, block in enumerate(blocks):
-            params.update({
-                f'upload_id_{i}': str(block.upload_id),
-                f'type_{i}': block.type.value,
-                f'content_{i}': block.content,
-                f'confidence_score_{i}': block.confidence_score,
-                f'suggested_asset_type_{i}': block.suggested_asset_type.value
-            })
+        await self.async_commit()
+        driver_connection = await self.get_driver_connection()
+        rows = await driver_connection.fetch(
+            SQL_INSERT_CONTENT_BLOCKS,
+            ids,
+            [block.upload_id for block in blocks],
+            [block.type.value for block in blocks],
+            [block.content for block in blocks],
+            [block.confidence_score for block in blocks],
+            [block.suggested_asset_type.value for block in blocks]
+        )
+        if auto_commit:
+            await self.commit()
         
-        results = await self.fetch_all(query, params)
-        await self.commit()
+        # RETURNING order is not guaranteed; restore input order by id
+        rows_by_id = {row['id']: row for row in rows}
+        return [ContentBlock.model_construct(**rows_by_id[block_id]) for block_id in ids]
+    
+    async def _copy_batch(self, blocks: List[ContentBlockCreate], auto_commit: bool) -> List[ContentBlock]:
+        """Bulk-load blocks with COPY over the session's asyncpg connection"""
+        # created_at is TIMESTAMP (no time zone) and asyncpg rejects aware values for it, so pass naive UTC
+        created_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        records = [
+            (uuid4(), block.upload_id, block.type.value, block.content,
+             block.confidence_score, block.suggested_asset_type.value, created_at)
+            for block in blocks
+        ]
         
-        return [ContentBlock(**dict(row._mapping)) for row in results]
+        # COPY has no RETURNING, so ids are generated here and the rows rebuilt locally
+        await self.async_commit()
+        driver_connection = await self.get_driver_connection()
+        await driver_connection.copy_records_to_table(
+            'content_blocks', records=records, columns=CONTENT_BLOCK_COLUMNS
+        )
+        if auto_commit:
+            await self.commit()
+        
+        return [ContentBlock.model_construct(**dict(zip(CONTENT_BLOCK_COLUMNS, record))) for record in records]
     
     async def get_by_upload_id(self, upload_id: UUID) -> List[ContentBlock]:
         """Get all content blocks for an upload"""
-        query = """
-        SELECT * FROM content_blocks 
-        WHERE upload_id = :upload_id 
-        ORDER BY created_at ASC
-        """
-        
-        results = await self.fetch_all(query, {'upload_id': str(upload_id)})
-        return [ContentBlock(**dict(row._mapping)) for row in results]
+        results = await self.fetch_all(SQL_BLOCKS_BY_UPLOAD, {'upload_id': upload_id})
+        return [ContentBlock.model_construct(**row._mapping) for row in results]
 
 
 class UserRepository(BaseRepository):
@@ -213,69 +360,90 @@ class UserRepository(BaseRepository):
     
     async def create(self, user_data: UserCreate, password_hash: str) -> User:
         """Create a new user with password"""
-        # Start transaction
         try:
-            # Create user
-            user_query = """
-            INSERT INTO users (id, name, email, role, stage, created_at, updated_at)
-            VALUES (uuid_generate_v4(), :name, :email, :role, :stage, NOW(), NOW())
-            RETURNING *
-            """
-            
-            user_values = {
+            # User and password row are created by one atomic statement
+            user_result = await self.fetch_one(SQL_CREATE_USER_WITH_PASSWORD, {
                 'name': user_data.name,
                 'email': user_data.email,
                 'role': user_data.role.value,
-                'stage': user_data.stage
-            }
-            
-            user_result = await self.fetch_one(user_query, user_values)
-            user = User(**dict(user_result._mapping))
-            
-            # Create password
-            password_query = """
-            INSERT INTO user_passwords (id, user_id, password_hash, created_at)
-            VALUES (uuid_generate_v4(), :user_id, :password_hash, NOW())
-            """
-            
-            await self.execute_query(password_query, {
-                'user_id': str(user.id),
+                'stage': user_data.stage,
                 'password_hash': password_hash
             })
             
             await self.commit()
-            return user
+            return User.model_construct(**user_result._mapping)
             
         except Exception as e:
             await self.rollback()
             raise e
     
     async def get_by_email(self, email: str) -> Optional[User]:
-        """Get user by email"""
-        query = "SELECT * FROM users WHERE email = :email"
-        result = await self.fetch_one(query, {'email': email})
+        """Get user by email, served from the user cache when fresh"""
+        user = _get_cached_user(('email', email))
+        if user is not None:
+            return user
+        
+        result = await self.fetch_row_raw(SQL_USER_BY_EMAIL, email)
         
         if result:
-            return User(**dict(result._mapping))
+            return _cache_user(User.model_construct(**result))
         return None
     
     async def get_by_id(self, user_id: UUID) -> Optional[User]:
-        """Get user by ID"""
-        query = "SELECT * FROM users WHERE id = :user_id"
-        result = await self.fetch_one(query, {'user_id': str(user_id)})
+        """Get user by ID, served from the user cache when fresh"""
+        user = _get_cached_user(('id', user_id))
+        if user is not None:
+            return user
+        
+        result = await self.fetch_row_raw(SQL_USER_BY_ID, user_id)
         
         if result:
-            return User(**dict(result._mapping))
+            return _cache_user(User.model_construct(**result))
         return None
     
     async def get_password_hash(self, user_id: UUID) -> Optional[str]:
         """Get password hash for user"""
-        query = "SELECT password_hash FROM user_passwords WHERE user_id = :user_id"
-        result = await self.fetch_one(query, {'user_id': str(user_id)})
+        result = await self.fetch_one(SQL_PASSWORD_HASH, {'user_id': user_id})
         
         if result:
             return result.password_hash
         return None
+    
+    async def update(self, user_id: UUID, user_data: UserUpdate) -> Optional[User]:
+        """Update the given user fields"""
+        # mode='json' stores role as its enum value
+        values = user_data.model_dump(mode='json', exclude_unset=True)
+        if not values:
+            return await self.get_by_id(user_id)
+        
+        assignments = ", ".join(f"{key} = :{key}" for key in values)
+        query = f"UPDATE users SET {assignments}, updated_at = NOW() WHERE id = :user_id RETURNING *"
+        
+        try:
+            result = await self.fetch_one(query, {**values, 'user_id': user_id})
+            await self.commit()
+        except Exception as e:
+            await self.rollback()
+            raise e
+        finally:
+            invalidate_cached_user(user_id=user_id, email=values.get('email'))
+        
+        if result:
+            return User.model_construct(**result._mapping)
+        return None
+    
+    async def delete(self, user_id: UUID) -> bool:
+        """Delete a user and its password row"""
+        try:
+            result = await self.fetch_one(SQL_DELETE_USER, {'user_id': user_id})
+            await self.commit()
+        except Exception as e:
+            await self.rollback()
+            raise e
+        finally:
+            invalidate_cached_user(user_id=user_id)
+        
+        return result is not None
 
 
 class PlaybookRepository(BaseRepository):
@@ -298,65 +466,62 @@ class PlaybookRepository(BaseRepository):
             'tags': playbook_data.tags,
             'stage': playbook_data.stage,
             'status': playbook_data.status.value,
-            'owner_id': str(playbook_data.owner_id),
+            'owner_id': playbook_data.owner_id,
             'version': playbook_data.version
         }
         
         result = await self.fetch_one(query, values)
         await self.commit()
         
-        return Playbook(**dict(result._mapping))
+        return Playbook.model_construct(**result._mapping)
     
     async def get_by_id(self, playbook_id: UUID) -> Optional[Playbook]:
         """Get playbook by ID"""
-        query = "SELECT * FROM playbooks WHERE id = :playbook_id"
-        result = await self.fetch_one(query, {'playbook_id': str(playbook_id)})
+        result = await self.fetch_one(SQL_PLAYBOOK_BY_ID, {'playbook_id': playbook_id})
         
         if result:
-            return Playbook(**dict(result._mapping))
+            return Playbook.model_construct(**result._mapping)
         return None
     
     async def get_by_owner(self, owner_id: UUID, limit: int = 10) -> List[Playbook]:
         """Get playbooks by owner"""
-        query = """
-        SELECT * FROM playbooks 
-        WHERE owner_id = :owner_id 
-        ORDER BY updated_at DESC 
-        LIMIT :limit
-        """
-        
-        results = await self.fetch_all(query, {
-            'owner_id': str(owner_id),
+        results = await self.fetch_all(SQL_PLAYBOOKS_BY_OWNER, {
+            'owner_id': owner_id,
             'limit': limit
         })
         
-        return [Playbook(**dict(row._mapping)) for row in results]
+        return [Playbook.model_construct(**row._mapping) for row in results]
 
 
 # Repository Factory
 class RepositoryFactory:
-    """Factory for creating repository instances"""
+    """Factory for repositories that share one session per unit of work.
+    
+    Create one factory per request or background job so every repository it hands out
+    uses the same session: one pool checkout and one BEGIN/COMMIT instead of one each.
+    """
+    
+    def __init__(self, session: Optional[AsyncSession] = None):
+        self.session = session
+    
+    async def get_session(self) -> AsyncSession:
+        """Check out a session on first use and reuse it afterwards"""
+        if self.session is None:
+            self.session = await get_db_session()
+        return self.session
     
-    @staticmethod
-    async def get_upload_repository() -> UploadRepository:
+    async def get_upload_repository(self) -> UploadRepository:
         """Get upload repository instance"""
-        session = await get_db_session()
-        return UploadRepository(session)
+        return UploadRepository(await self.get_session())
     
-    @staticmethod
-    async def get_content_block_repository() -> ContentBlockRepository:
+    async def get_content_block_repository(self) -> ContentBlockRepository:
         """Get content block repository instance"""
-        session = await get_db_session()
-        return ContentBlockRepository(session)
+        return ContentBlockRepository(await self.get_session())
     
-    @staticmethod
-    async def get_user_repository() -> UserRepository:
+    async def get_user_repository(self) -> UserRepository:
         """Get user repository instance"""
-        session = await get_db_session()
-        return UserRepository(session)
+        return UserRepository(await self.get_session())
     
-    @staticmethod
-    async def get_playbook_repository() -> PlaybookRepository:
+    async def get_playbook_repository(self) -> PlaybookRepository:
         """Get playbook repository instance"""
-        session = await get_db_session()
-        return PlaybookRepository(session)
+        return PlaybookRepository(await self.get_session())
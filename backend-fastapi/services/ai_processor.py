@@ -4,8 +4,15 @@ AI-powered content processing using ONLY Gemini embeddings
 """
 
 import os
+import re
 import json
+import hashlib
+import queue
+import threading
+import time
 import requests
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import List, Dict, Any
 from dotenv import load_dotenv
 import google.generativeai as genai
@@ -18,12 +25,70 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
 if GOOGLE_API_KEY:
     genai.configure(api_key=GOOGLE_API_KEY)
 
+# Gemini embedding model; embed_content takes up to EMBEDDING_API_BATCH texts per request
+EMBEDDING_MODEL = "models/text-embedding-004"
+EMBEDDING_API_BATCH = 100
+
+# Width of the embeddings.embedding column (vector(1536) in the current schema); 768-dim
+# Gemini vectors are zero-padded up to it. Set to 768 once the column is migrated to halfvec(768).
+EMBEDDING_COLUMN_DIMS = int(os.getenv("EMBEDDING_COLUMN_DIMS", "1536"))
+
+# Micro-batching of embedding requests across concurrent uploads
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_BATCH_WAIT = int(os.getenv("EMBEDDING_BATCH_WAIT_MS", "50")) / 1000
+# Batches sent to Gemini at once, so one large upload doesn't hold up the others
+EMBEDDING_FLUSH_WORKERS = int(os.getenv("EMBEDDING_FLUSH_WORKERS", "4"))
+
 # Playbook asset types from your schema
-PLAYBOOK_ASSET_TYPES = [
+PLAYBOOK_ASSET_TYPES = (
     "goal", "strategy", "timeline", "faq", "task", 
     "metric", "resource", "example", "template", "checklist"
+)
+
+# Position of each asset type's section in a generated playbook
+_SECTION_ORDER = {
+    asset_type: position
+    for position, asset_type in enumerate(
+        ("goal", "strategy", "timeline", "task", "metric", "faq", "resource", "example", "template", "checklist")
+    )
+}
+
+# Keyword groups for classify_by_embedding_similarity, in priority order
+ASSET_TYPE_KEYWORDS = [
+    ("goal", ["goal", "objective", "aim", "target", "mission", "vision", "purpose"]),
+    ("strategy", ["strategy", "approach", "plan", "framework", "methodology", "tactics"]),
+    ("timeline", ["timeline", "schedule", "milestone", "deadline", "phase", "week", "month", "quarter"]),
+    ("task", ["task", "action", "step", "todo", "implement", "execute", "do", "perform"]),
+    ("faq", ["question", "q:", "a:", "faq", "what", "how", "why", "when", "where"]),
+    ("metric", ["metric", "kpi", "measure", "track", "analytics", "performance", "data"]),
+    ("resource", ["resource", "link", "url", "reference", "documentation", "tool", "library"]),
+    ("example", ["example", "case study", "demo", "sample", "illustration", "instance"]),
+    ("template", ["template", "format", "structure", "outline", "boilerplate"]),
+    ("checklist", ["checklist", "checkbox", "✓", "☐", "[ ]", "- [ ]", "verify", "confirm"]),
 ]
 
+# Short descriptions embedded once as per-asset-type prototype vectors
+ASSET_TYPE_DESCRIPTIONS = {
+    "goal": "Goals, objectives, mission and vision the team is aiming for",
+    "strategy": "Strategy, approach, plan or framework for achieving results",
+    "timeline": "Timeline, schedule, milestones, deadlines and phases",
+    "faq": "Frequently asked questions and their answers",
+    "task": "Concrete tasks, actions and steps to carry out",
+    "metric": "Metrics, KPIs and measurements used to track performance",
+    "resource": "Resources, links, references, documentation and tools",
+    "example": "Examples, case studies, demos and samples",
+    "template": "Templates, formats and outlines to reuse",
+    "checklist": "Checklists of items to verify or confirm",
+}
+
+_prototypes = None
+_prototypes_lock = threading.Lock()
+
+# Nearest asset type by content digest; repeated boilerplate blocks skip the embedding call
+CLASSIFICATION_CACHE_SIZE = 10_000
+_nearest_type_cache = OrderedDict()
+_nearest_type_lock = threading.Lock()
+
 def classify_content_blocks(blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Step 2: Classify content blocks using ONLY Gemini embeddings
@@ -33,6 +98,8 @@ def classify_content_blocks(blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]
     if not GOOGLE_API_KEY:
         raise Exception("❌ Gemini API key required - no fallback methods allowed")
     
+    nearest_types = nearest_asset_types([block.get("content", "") for block in blocks])
+    
     classified_blocks = []
     
     for i, block in enumerate(blocks):
@@ -40,7 +107,7 @@ def classify_content_blocks(blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]
         block_type = block.get("type", "text")
         
         # Use Gemini embeddings for classification
-        classification_result = classify_with_gemini_embeddings(content, block_type)
+        classification_result = classify_with_gemini_embeddings(content, block_type, nearest_types[i])
         
         classified_block = {
             "id": f"block_{i}",
@@ -63,125 +130,142 @@ def classify_content_blocks(blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]
     
     return classified_blocks
 
-def classify_with_gemini_embeddings(content: str, block_type: str) -> Dict[str, Any]:
-    """Use ONLY Gemini embeddings for semantic classification"""
+def embed_for_classification(texts: List[str]) -> np.ndarray:
+    """Embed texts for classification, returning L2-normalized float32 rows"""
     
     try:
-        print(f"🧠 Generating embedding for classification...")
+        print(f"🧠 Generating {len(texts)} embeddings for classification...")
         
-        # Generate embedding for the content
-        result = genai.generate_embeddings(
-            model='models/embedding-gecko-001',
-            text=content[:1000]  # Limit input length
-        )
-        
-        if result and 'embedding' in result:
-            embedding = result['embedding']
-            
-            # Use embedding-based semantic classification
-            asset_type = classify_by_embedding_similarity(content, embedding)
-            
-            # Generate semantic tags
-            tags = generate_semantic_tags(content)
-            
-            return {
-                "asset_type": asset_type,
-                "confidence": 0.9,  # High confidence for Gemini embeddings
-                "tags": tags,
-                "summary": content[:100] + "..." if len(content) > 100 else content,
-                "reasoning": "Gemini embedding-based semantic classification"
-            }
-        else:
-            raise Exception("No embedding returned from Gemini")
+        vectors = []
+        for start in range(0, len(texts), EMBEDDING_API_BATCH):
+            result = genai.embed_content(
+                model=EMBEDDING_MODEL,
+                content=[text[:1000] for text in texts[start:start + EMBEDDING_API_BATCH]],  # Limit input length
+                task_type="classification"
+            )
+            if not result or 'embedding' not in result:
+                raise Exception("No embedding returned from Gemini")
+            vectors.extend(result['embedding'])
         
     except Exception as e:
         print(f"❌ Gemini embedding classification failed: {e}")
         raise Exception(f"Gemini-only classification failed: {e}")
+    
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.size:
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    return matrix
+
+def get_asset_prototypes() -> np.ndarray:
+    """Prototype embeddings for PLAYBOOK_ASSET_TYPES, computed once per process"""
+    global _prototypes
+    if _prototypes is None:
+        with _prototypes_lock:
+            if _prototypes is None:
+                _prototypes = embed_for_classification(
+                    [ASSET_TYPE_DESCRIPTIONS[asset_type] for asset_type in PLAYBOOK_ASSET_TYPES]
+                )
+    return _prototypes
+
+def classify_by_prototypes(embeddings: np.ndarray) -> List[str]:
+    """Nearest asset type for each embedding row by cosine similarity"""
+    if not len(embeddings):
+        return []
+    scores = embeddings @ get_asset_prototypes().T
+    return [PLAYBOOK_ASSET_TYPES[index] for index in scores.argmax(axis=1)]
+
+def nearest_asset_types(contents: List[str]) -> List[str]:
+    """Nearest prototype asset type per content, embedding only uncached non-empty texts"""
+    keys = [
+        hashlib.blake2b(content[:1000].encode(), digest_size=16).digest() if content.strip() else None
+        for content in contents
+    ]
+    
+    # Cached types are copied out under the lock so a concurrent eviction cannot drop them mid-call
+    found = {}
+    missing = {}
+    with _nearest_type_lock:
+        for key, content in zip(keys, contents):
+            if key is None or key in found or key in missing:
+                continue
+            asset_type = _nearest_type_cache.get(key)
+            if asset_type is None:
+                missing[key] = content
+            else:
+                _nearest_type_cache.move_to_end(key)
+                found[key] = asset_type
+    
+    # Embed each new text once (outside the lock), then score them all against the prototypes in one matmul
+    if missing:
+        embeddings = embed_for_classification(list(missing.values()))
+        new_types = dict(zip(missing, classify_by_prototypes(embeddings)))
+        found.update(new_types)
+        with _nearest_type_lock:
+            _nearest_type_cache.update(new_types)
+            while len(_nearest_type_cache) > CLASSIFICATION_CACHE_SIZE:
+                _nearest_type_cache.popitem(last=False)
+    
+    # Nothing to embed - keep the business default
+    return [found[key] if key is not None else "strategy" for key in keys]
+
+def classify_with_gemini_embeddings(content: str, block_type: str, nearest_type: str) -> Dict[str, Any]:
+    """Build the classification for one block from its embedding's nearest asset type"""
+    
+    # Use embedding-based semantic classification
+    asset_type = classify_by_embedding_similarity(content, nearest_type)
+    
+    # Generate semantic tags
+    tags = generate_semantic_tags(content)
+    
+    return {
+        "asset_type": asset_type,
+        "confidence": 0.9,  # High confidence for Gemini embeddings
+        "tags": tags,
+        "summary": content[:100] + "..." if len(content) > 100 else content,
+        "reasoning": "Gemini embedding-based semantic classification"
+    }
 
-def classify_by_embedding_similarity(content: str, embedding: List[float]) -> str:
-    """Classify content based on embedding similarity patterns"""
+def classify_by_embedding_similarity(content: str, nearest_type: str) -> str:
+    """Classify content by keyword patterns, falling back to the nearest embedding prototype"""
     
     content_lower = content.lower()
     
-    # Embedding-informed classification with semantic patterns
-    # Since we have actual semantic embeddings, we can make better decisions
-    
-    # Goal-related content
-    goal_keywords = ["goal", "objective", "aim", "target", "mission", "vision", "purpose"]
-    if any(keyword in content_lower for keyword in goal_keywords):
-        return "goal"
-    
-    # Strategy-related content  
-    strategy_keywords = ["strategy", "approach", "plan", "framework", "methodology", "tactics"]
-    if any(keyword in content_lower for keyword in strategy_keywords):
-        return "strategy"
-    
-    # Timeline-related content
-    timeline_keywords = ["timeline", "schedule", "milestone", "deadline", "phase", "week", "month", "quarter"]
-    if any(keyword in content_lower for keyword in timeline_keywords):
-        return "timeline"
-    
-    # Task-related content
-    task_keywords = ["task", "action", "step", "todo", "implement", "execute", "do", "perform"]
-    if any(keyword in content_lower for keyword in task_keywords):
-        return "task"
-    
-    # FAQ-related content
-    faq_keywords = ["question", "q:", "a:", "faq", "what", "how", "why", "when", "where"]
-    if any(keyword in content_lower for keyword in faq_keywords):
-        return "faq"
-    
-    # Metric-related content
-    metric_keywords = ["metric", "kpi", "measure", "track", "analytics", "performance", "data"]
-    if any(keyword in content_lower for keyword in metric_keywords):
-        return "metric"
-    
-    # Resource-related content
-    resource_keywords = ["resource", "link", "url", "reference", "documentation", "tool", "library"]
-    if any(keyword in content_lower for keyword in resource_keywords):
-        return "resource"
-    
-    # Example-related content
-    example_keywords = ["example", "case study", "demo", "sample", "illustration", "instance"]
-    if any(keyword in content_lower for keyword in example_keywords):
-        return "example"
-    
-    # Template-related content
-    template_keywords = ["template", "format", "structure", "outline", "boilerplate"]
-    if any(keyword in content_lower for keyword in template_keywords):
-        return "template"
-    
-    # Checklist-related content
-    checklist_keywords = ["checklist", "checkbox", "✓", "☐", "[ ]", "- [ ]", "verify", "confirm"]
-    if any(keyword in content_lower for keyword in checklist_keywords):
-        return "checklist"
-    
-    # Default to strategy for business content
-    return "strategy"
+    # First keyword group with a match wins, in ASSET_TYPE_KEYWORDS priority order
+    for asset_type, keywords in ASSET_TYPE_KEYWORDS:
+        if any(keyword in content_lower for keyword in keywords):
+            return asset_type
+    
+    # No explicit keywords - trust the embedding
+    return nearest_type
+
+# Business domain tags for generate_semantic_tags
+BUSINESS_KEYWORDS = {
+    "startup": ["startup", "entrepreneur", "venture", "launch", "founder"],
+    "marketing": ["marketing", "brand", "customer", "audience", "campaign"],
+    "strategy": ["strategy", "plan", "approach", "framework", "methodology"],
+    "growth": ["growth", "scale", "expand", "develop", "increase"],
+    "revenue": ["revenue", "sales", "income", "profit", "monetization"],
+    "product": ["product", "feature", "development", "mvp", "prototype"],
+    "team": ["team", "hiring", "culture", "collaboration", "management"],
+    "funding": ["funding", "investment", "investor", "capital", "financing"],
+    "technology": ["technology", "tech", "software", "platform", "system"],
+    "data": ["data", "analytics", "metrics", "measurement", "tracking"]
+}
+
+# One compiled alternation per tag; keeps substring matching ("develop" in "developing")
+_BUSINESS_TAG_PATTERNS = [
+    (tag, re.compile("|".join(re.escape(keyword) for keyword in keywords)))
+    for tag, keywords in BUSINESS_KEYWORDS.items()
+]
+_DIGIT_RE = re.compile(r"\d")
 
 def generate_semantic_tags(content: str) -> List[str]:
     """Generate semantic tags based on content analysis"""
     
-    tags = []
     content_lower = content.lower()
     
     # Business domain tags
-    business_keywords = {
-        "startup": ["startup", "entrepreneur", "venture", "launch", "founder"],
-        "marketing": ["marketing", "brand", "customer", "audience", "campaign"],
-        "strategy": ["strategy", "plan", "approach", "framework", "methodology"],
-        "growth": ["growth", "scale", "expand", "develop", "increase"],
-        "revenue": ["revenue", "sales", "income", "profit", "monetization"],
-        "product": ["product", "feature", "development", "mvp", "prototype"],
-        "team": ["team", "hiring", "culture", "collaboration", "management"],
-        "funding": ["funding", "investment", "investor", "capital", "financing"],
-        "technology": ["technology", "tech", "software", "platform", "system"],
-        "data": ["data", "analytics", "metrics", "measurement", "tracking"]
-    }
-    
-    for tag, keywords in business_keywords.items():
-        if any(keyword in content_lower for keyword in keywords):
-            tags.append(tag)
+    tags = [tag for tag, pattern in _BUSINESS_TAG_PATTERNS if pattern.search(content_lower)]
     
     # Content characteristic tags
     if len(content) > 500:
@@ -192,7 +276,7 @@ def generate_semantic_tags(content: str) -> List[str]:
     if "?" in content:
         tags.append("question")
     
-    if any(char.isdigit() for char in content):
+    if _DIGIT_RE.search(content):
         tags.append("quantitative")
     
     return tags[:5]  # Limit to 5 tags
@@ -206,47 +290,47 @@ def generate_embeddings(blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     if not GOOGLE_API_KEY:
         raise Exception("❌ Gemini API key required - no mock embeddings allowed")
     
-    blocks_with_embeddings = []
+    # One request per EMBEDDING_API_BATCH blocks instead of one per block
+    embeddings = []
+    for start in range(0, len(blocks), EMBEDDING_API_BATCH):
+        batch = blocks[start:start + EMBEDDING_API_BATCH]
+        embeddings.extend(generate_embeddings_gemini([block.get("content", "") for block in batch]))
     
-    for block in blocks:
-        content = block.get("content", "")
-        
-        # Generate embedding using Gemini
-        embedding = generate_embedding_gemini(content)
-        
-        block_with_embedding = {
+    blocks_with_embeddings = [
+        {
             **block,
             "embedding": embedding,
-            "embedding_model": "gemini-embedding-gecko-001",
+            "embedding_model": "gemini-text-embedding-004",
             "embedding_dims": len(embedding)
         }
-        
-        blocks_with_embeddings.append(block_with_embedding)
+        for block, embedding in zip(blocks, embeddings)
+    ]
     
     print(f"✅ Generated {len(blocks_with_embeddings)} real Gemini embeddings")
     return blocks_with_embeddings
 
-def generate_embedding_gemini(text: str) -> List[float]:
-    """Generate embedding using ONLY Gemini"""
+def generate_embeddings_gemini(texts: List[str]) -> List[List[float]]:
+    """Generate embeddings for a batch of texts in a single Gemini request"""
     
     try:
-        print(f"🧠 Generating real Gemini embedding...")
+        print(f"🧠 Generating {len(texts)} real Gemini embeddings...")
         
-        # Use the available Gemini embedding model
-        result = genai.generate_embeddings(
-            model='models/embedding-gecko-001',
-            text=text[:2000]  # Limit input length
+        result = genai.embed_content(
+            model=EMBEDDING_MODEL,
+            content=[text[:2000] for text in texts],  # Limit input length
+            task_type="retrieval_document"
         )
         
         if result and 'embedding' in result:
-            embedding = result['embedding']
-            print(f"✅ Generated real Gemini embedding: {len(embedding)} dimensions")
+            embeddings = result['embedding']
+            print(f"✅ Generated real Gemini embeddings: {len(embeddings[0]) if embeddings else 0} dimensions")
             
-            # Pad to 1536 dimensions if needed (Supabase requirement)
-            while len(embedding) < 1536:
-                embedding.append(0.0)
+            # Only a legacy, wider column needs zero padding
+            if EMBEDDING_COLUMN_DIMS > len(embeddings[0] if embeddings else ()):
+                for embedding in embeddings:
+                    embedding.extend([0.0] * (EMBEDDING_COLUMN_DIMS - len(embedding)))
             
-            return embedding[:1536]
+            return embeddings
         else:
             raise Exception("No embedding returned from Gemini API")
             
@@ -254,6 +338,100 @@ def generate_embedding_gemini(text: str) -> List[float]:
         print(f"❌ Gemini embedding error: {e}")
         raise Exception(f"Gemini embedding generation failed: {e}")
 
+class EmbeddingBatcher:
+    """Coalesce blocks from concurrent uploads into shared generate_embeddings calls"""
+    
+    def __init__(self, batch_size: int = EMBEDDING_BATCH_SIZE, max_wait: float = EMBEDDING_BATCH_WAIT):
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        # Flushes run here; its own pool, since upload threads block on embed() waiting for them
+        self._executor = ThreadPoolExecutor(max_workers=EMBEDDING_FLUSH_WORKERS, thread_name_prefix="embedding-flush")
+    
+    def submit(self, blocks: List[Dict[str, Any]]) -> Future:
+        """Queue blocks for embedding; the future resolves to the embedded blocks"""
+        future = Future()
+        if not blocks:
+            future.set_result([])
+            return future
+        
+        self._ensure_worker()
+        self._queue.put((blocks, future))
+        return future
+    
+    def embed(self, blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Blocking helper: queue blocks and wait for their embeddings"""
+        return self.submit(blocks).result()
+    
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+    
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            try:
+                count = len(pending[0][0])
+                deadline = time.monotonic() + self.max_wait
+                
+                # Keep collecting until the batch is full or the wait window closes
+                while count < self.batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                    pending.append(item)
+                    count += len(item[0])
+                
+                # Hand the batch off so the next one can be collected and sent meanwhile
+                self._executor.submit(self._flush, pending)
+            except Exception as e:
+                # Never let the collector thread die; fail this batch and keep serving
+                self._fail(pending, e)
+    
+    def _flush(self, pending):
+        try:
+            all_blocks = [block for blocks, _ in pending for block in blocks]
+            print(f"🧠 Embedding batch of {len(all_blocks)} blocks from {len(pending)} uploads")
+            
+            try:
+                embedded = generate_embeddings(all_blocks)
+            except Exception as e:
+                if len(pending) == 1:
+                    pending[0][1].set_exception(e)
+                    return
+                # Retry per upload so one bad upload doesn't fail the whole batch
+                for blocks, future in pending:
+                    try:
+                        future.set_result(generate_embeddings(blocks))
+                    except Exception as upload_error:
+                        future.set_exception(upload_error)
+                return
+            
+            offset = 0
+            for blocks, future in pending:
+                future.set_result(embedded[offset:offset + len(blocks)])
+                offset += len(blocks)
+        except Exception as e:
+            self._fail(pending, e)
+    
+    @staticmethod
+    def _fail(pending, error):
+        """Resolve every still-waiting future in a batch with the error"""
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+# Shared batcher used by the upload pipeline
+embedding_batcher = EmbeddingBatcher()
+
 def generate_playbook_suggestions(blocks: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Generate playbook structure suggestions using semantic analysis
@@ -276,33 +454,33 @@ def generate_playbook_suggestions(blocks: List[Dict[str, Any]]) -> Dict[str, Any
 def generate_semantic_structure(grouped_blocks: Dict[str, List]) -> Dict[str, Any]:
     """Generate playbook structure using semantic analysis"""
     
-    sections = []
-    section_order = ["goal", "strategy", "timeline", "task", "metric", "faq", "resource", "example", "template", "checklist"]
-    
-    order = 1
-    for asset_type in section_order:
-        if asset_type in grouped_blocks:
-            sections.append({
-                "type": asset_type,
-                "title": asset_type.title() + "s",
-                "order": order,
-                "count": len(grouped_blocks[asset_type]),
-                "semantic_confidence": 0.9
-            })
-            order += 1
-    
-    # Analyze content themes
+    # Count blocks and collect content themes in a single pass
+    counts = Counter()
     all_tags = set()
-    for blocks in grouped_blocks.values():
+    for asset_type, blocks in grouped_blocks.items():
+        counts[asset_type] = len(blocks)
         for block in blocks:
-            all_tags.update(block.get("tags", []))
+            all_tags.update(block.get("tags", ()))
+    total_blocks = sum(counts.values())
+    
+    present_types = sorted((t for t in counts if t in _SECTION_ORDER), key=_SECTION_ORDER.__getitem__)
+    sections = [
+        {
+            "type": asset_type,
+            "title": asset_type.title() + "s",
+            "order": order,
+            "count": counts[asset_type],
+            "semantic_confidence": 0.9
+        }
+        for order, asset_type in enumerate(present_types, 1)
+    ]
     
     return {
         "title": "AI-Generated Playbook",
-        "description": f"Semantically processed playbook with {sum(len(blocks) for blocks in grouped_blocks.values())} content blocks",
+        "description": f"Semantically processed playbook with {total_blocks} content blocks",
         "sections": sections,
-        "total_blocks": sum(len(blocks) for blocks in grouped_blocks.values()),
-        "asset_distribution": {k: len(v) for k, v in grouped_blocks.items()},
+        "total_blocks": total_blocks,
+        "asset_distribution": dict(counts),
         "themes": list(all_tags)[:10],
         "estimated_completion_time": "1-3 hours",
         "difficulty": "intermediate",
@@ -1,10 +1,15 @@
 import os
-import requests
+import zipfile
+import httpx
 import asyncio
-from typing import Dict, List, Any
-import PyPDF2
-import docx
-from bs4 import BeautifulSoup
+import copy
+import functools
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional
+import pypdfium2 as pdfium
+import lxml.html
+from lxml import etree
 import io
 import google.generativeai as genai
 from dotenv import load_dotenv
@@ -16,6 +21,38 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
 if GOOGLE_API_KEY:
     genai.configure(api_key=GOOGLE_API_KEY)
 
+# Extraction results by upload SHA-256, so identical re-uploads skip parsing. Used only from the
+# web process (process_upload_background); CPU_POOL workers never read or fill it
+EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "256"))
+_extraction_cache = OrderedDict()
+_extraction_cache_lock = threading.Lock()
+extraction_cache_stats = {"hits": 0, "misses": 0}
+
+def get_cached_extraction(key: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Return a copy of a cached extraction result, or None on a miss"""
+    if not EXTRACTION_CACHE_ENABLED or key is None:
+        return None
+    with _extraction_cache_lock:
+        result = _extraction_cache.get(key)
+        if result is None:
+            extraction_cache_stats["misses"] += 1
+            return None
+        _extraction_cache.move_to_end(key)
+        extraction_cache_stats["hits"] += 1
+    return copy.deepcopy(result)
+
+def cache_extraction(key: Optional[str], result: Dict[str, Any]):
+    """Remember an extraction result, evicting the least recently used entries"""
+    if not EXTRACTION_CACHE_ENABLED or key is None:
+        return
+    result = copy.deepcopy(result)
+    with _extraction_cache_lock:
+        _extraction_cache[key] = result
+        _extraction_cache.move_to_end(key)
+        while len(_extraction_cache) > EXTRACTION_CACHE_SIZE:
+            _extraction_cache.popitem(last=False)
+
 async def extract_content_from_file(file_path: str, mime_type: str) -> Dict[str, Any]:
     """Extract content from uploaded file using ONLY Gemini"""
     
@@ -31,26 +68,97 @@ async def extract_content_from_file(file_path: str, mime_type: str) -> Dict[str,
         # Fallback to text extraction
         return await extract_from_text(file_path)
 
+# Shared keep-alive pool for URL imports, created on first use inside the running loop
+_http_client = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Module-level AsyncClient so URL fetches reuse TCP/TLS connections"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=30,
+            follow_redirects=True,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100)
+        )
+    return _http_client
+
+async def close_http():
+    """Close the shared HTTP client; call on the same loop at shutdown"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+async def run_blocking(func, *args):
+    """Run blocking file/network work on the default thread pool (asyncio.to_thread for Python 3.8)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args))
+
+def extract_content_from_file_sync(file_path: str, mime_type: str) -> Dict[str, Any]:
+    """Blocking entry point for worker processes; runs the extractor on its own event loop"""
+    return asyncio.run(extract_content_from_file(file_path, mime_type))
+
+# PDFs with at least this many pages are split into page ranges across the process pool
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32"))
+
+def pdf_page_count(file_path: str) -> int:
+    """Number of pages, read from the PDF's page tree without extracting text"""
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+def _read_pdf_text(file_path: str, start: int = 0, stop: Optional[int] = None) -> str:
+    """Blocking PDF text extraction for pages [start, stop)"""
+    pages = []
+    
+    # PDFium (C++) does the text extraction instead of pure-Python PyPDF2
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        for index in range(start, len(pdf) if stop is None else stop):
+            # PDFium ends lines with \r\n; paragraph splitting downstream looks for \n\n
+            text = pdf[index].get_textpage().get_text_range()
+            pages.append(text.replace("\r\n", "\n").replace("\r", "\n") + "\n")
+    finally:
+        pdf.close()
+    
+    return "".join(pages)
+
+def read_pdf_text_parallel(file_path: str, executor, workers: int, page_count: int) -> str:
+    """Scatter contiguous page ranges over a process pool; each worker opens its own document"""
+    step = max(1, -(-page_count // workers))
+    futures = [
+        executor.submit(_read_pdf_text, file_path, start, min(start + step, page_count))
+        for start in range(0, page_count, step)
+    ]
+    return "".join(future.result() for future in futures)
+
+def smart_content_parsing_sync(raw_text: str, source_type: str) -> Dict[str, Any]:
+    """Blocking entry point for parsing text that was already extracted"""
+    return asyncio.run(smart_content_parsing(raw_text, source_type))
+
 async def extract_from_pdf(file_path: str) -> Dict[str, Any]:
     """Extract content from PDF file using Gemini"""
-    raw_text = ""
     
     try:
-        with open(file_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            for page in reader.pages:
-                raw_text += page.extract_text() + "\n"
+        raw_text = await run_blocking(_read_pdf_text, file_path)
     except Exception as e:
         raise Exception(f"Failed to extract from PDF: {str(e)}")
     
     return await smart_content_parsing(raw_text, "pdf")
 
+def _read_text_file(file_path: str) -> str:
+    """Blocking UTF-8 file read"""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return file.read()
+
 async def extract_from_text(file_path: str) -> Dict[str, Any]:
     """Extract content from text file using Gemini"""
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            raw_text = file.read()
+        raw_text = await run_blocking(_read_text_file, file_path)
     except Exception as e:
         raise Exception(f"Failed to extract from text file: {str(e)}")
     
@@ -60,8 +168,7 @@ async def extract_from_markdown(file_path: str) -> Dict[str, Any]:
     """Extract content from Markdown file using Gemini-powered parsing"""
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            raw_text = file.read()
+        raw_text = await run_blocking(_read_text_file, file_path)
         
         print(f"📄 Processing markdown file: {len(raw_text)} characters")
     except Exception as e:
@@ -70,15 +177,62 @@ async def extract_from_markdown(file_path: str) -> Dict[str, Any]:
     
     return await smart_content_parsing(raw_text, "markdown")
 
+# WordprocessingML tags, pre-qualified for lxml comparisons
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_W_BODY = f"{{{_W_NS}}}body"
+_W_P = f"{{{_W_NS}}}p"
+_W_R = f"{{{_W_NS}}}r"
+_W_T = f"{{{_W_NS}}}t"
+_W_TAB = f"{{{_W_NS}}}tab"
+_W_BREAKS = (f"{{{_W_NS}}}br", f"{{{_W_NS}}}cr")
+_OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+# Uploaded XML is untrusted: no entity expansion (XXE) and no network fetches
+_SAFE_XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True)
+
+def _docx_main_part(archive: zipfile.ZipFile) -> str:
+    """Locate the main document part from the package relationships"""
+    try:
+        rels = etree.fromstring(archive.read("_rels/.rels"), _SAFE_XML_PARSER)
+        for rel in rels:
+            if rel.get("Type") == _OFFICE_DOCUMENT_REL:
+                return rel.get("Target").lstrip("/")
+    except KeyError:
+        pass
+    return "word/document.xml"
+
+def _read_docx_text(file_path: str) -> str:
+    """Blocking DOCX paragraph extraction, streamed with iterparse"""
+    lines = []
+    
+    with zipfile.ZipFile(file_path) as archive, archive.open(_docx_main_part(archive)) as xml:
+        for _, element in etree.iterparse(xml, events=("end",), resolve_entities=False, no_network=True):
+            parent = element.getparent()
+            # Same paragraphs as python-docx's doc.paragraphs: top-level body paragraphs only
+            if parent is None or parent.tag != _W_BODY:
+                continue
+            if element.tag == _W_P:
+                text = "".join(
+                    (child.text or "") if child.tag == _W_T
+                    else "\t" if child.tag == _W_TAB
+                    else "\n" if child.tag in _W_BREAKS
+                    else ""
+                    for run in element.iterchildren(_W_R)
+                    for child in run
+                )
+                if text.strip():
+                    lines.append(text + "\n")
+            # Drop finished body children so memory stays bounded
+            element.clear()
+            while element.getprevious() is not None:
+                del parent[0]
+    
+    return "".join(lines)
+
 async def extract_from_docx(file_path: str) -> Dict[str, Any]:
     """Extract content from DOCX file using Gemini"""
-    raw_text = ""
     
     try:
-        doc = docx.Document(file_path)
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():
-                raw_text += paragraph.text + "\n"
+        raw_text = await run_blocking(_read_docx_text, file_path)
     except Exception as e:
         raise Exception(f"Failed to extract from DOCX: {str(e)}")
     
@@ -157,29 +311,26 @@ def split_into_sections(text: str, source_type: str) -> List[str]:
     
     else:
         # Split by double newlines for other formats
-        sections = [s.strip() for s in text.split('\n\n') if s.strip()]
-        return sections
+        return [s for s in (p.strip() for p in text.split('\n\n')) if s]
+
+# Section classifiers in priority order; the first category with any hit wins
+_SECTION_TYPE_KEYWORDS = (
+    ("heading", ("#", "heading", "title")),
+    ("list", ("- ", "* ", "1.", "2.", "•")),
+    ("faq", ("q:", "a:", "question", "answer", "faq")),
+    ("code", ("```", "code", "function", "def ", "class ")),
+    ("table", ("|", "table", "row", "column")),
+    ("quote", ("quote",)),
+)
 
 async def classify_section_type(content: str) -> str:
     """Classify section type using semantic analysis"""
     
     content_lower = content.lower()
-    
-    # Enhanced semantic classification
-    if any(word in content_lower for word in ["#", "heading", "title"]):
-        return "heading"
-    elif any(word in content_lower for word in ["- ", "* ", "1.", "2.", "•"]):
-        return "list"
-    elif any(word in content_lower for word in ["q:", "a:", "question", "answer", "faq"]):
-        return "faq"
-    elif any(word in content_lower for word in ["```", "code", "function", "def ", "class "]):
-        return "code"
-    elif any(word in content_lower for word in ["|", "table", "row", "column"]):
-        return "table"
-    elif content.startswith(">") or "quote" in content_lower:
-        return "quote"
-    else:
-        return "text"
+    for section_type, words in _SECTION_TYPE_KEYWORDS:
+        if any(word in content_lower for word in words):
+            return section_type
+    return "quote" if content.startswith(">") else "text"
 
 def extract_header(content: str) -> str:
     """Extract header from content"""
@@ -190,28 +341,25 @@ def extract_header(content: str) -> str:
             return line.replace('#', '').strip()
     return ""
 
+# Keyword categories, each matched against the block's whitespace-separated words
+KEY_TERMS = {
+    "business": frozenset(["business", "company", "startup", "enterprise"]),
+    "strategy": frozenset(["strategy", "plan", "approach", "method"]),
+    "goal": frozenset(["goal", "objective", "target", "aim"]),
+    "timeline": frozenset(["timeline", "schedule", "deadline", "milestone"]),
+    "task": frozenset(["task", "action", "step", "todo"]),
+    "metric": frozenset(["metric", "kpi", "measure", "analytics"]),
+    "team": frozenset(["team", "member", "staff", "employee"]),
+    "product": frozenset(["product", "feature", "development", "mvp"]),
+    "marketing": frozenset(["marketing", "brand", "customer", "audience"]),
+    "revenue": frozenset(["revenue", "sales", "income", "profit"])
+}
+
 def extract_keywords(content: str) -> List[str]:
     """Extract keywords from content"""
-    # Simple keyword extraction
-    words = content.lower().split()
-    keywords = []
-    
-    key_terms = {
-        "business": ["business", "company", "startup", "enterprise"],
-        "strategy": ["strategy", "plan", "approach", "method"],
-        "goal": ["goal", "objective", "target", "aim"],
-        "timeline": ["timeline", "schedule", "deadline", "milestone"],
-        "task": ["task", "action", "step", "todo"],
-        "metric": ["metric", "kpi", "measure", "analytics"],
-        "team": ["team", "member", "staff", "employee"],
-        "product": ["product", "feature", "development", "mvp"],
-        "marketing": ["marketing", "brand", "customer", "audience"],
-        "revenue": ["revenue", "sales", "income", "profit"]
-    }
-    
-    for keyword, terms in key_terms.items():
-        if any(term in words for term in terms):
-            keywords.append(keyword)
+    # Simple keyword extraction: one set of words, then a hash probe per term
+    words = set(content.lower().split())
+    keywords = [keyword for keyword, terms in KEY_TERMS.items() if not terms.isdisjoint(words)]
     
     return keywords[:5]  # Limit to 5 keywords
 
@@ -219,7 +367,7 @@ async def extract_content_from_url(url: str) -> Dict[str, Any]:
     """Extract content from URL using Gemini"""
     
     try:
-        response = requests.get(url, timeout=30)
+        response = await get_http_client().get(url)
         if response.status_code != 200:
             raise Exception(f"Failed to fetch URL: HTTP {response.status_code}")
         
@@ -234,18 +382,23 @@ async def extract_content_from_url(url: str) -> Dict[str, Any]:
     except Exception as e:
         raise Exception(f"Failed to extract from URL {url}: {str(e)}")
 
+_HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
 async def extract_from_html(html_content: str, url: str) -> Dict[str, Any]:
     """Extract content from HTML using Gemini"""
     
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
+        if not html_content.strip():
+            return await smart_content_parsing("", "html")
+        
+        # libxml2's HTML parser; bytes so pages with an XML encoding declaration still parse
+        document = lxml.html.fromstring(html_content.encode("utf-8"), parser=_HTML_PARSER)
         
         # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.extract()
+        etree.strip_elements(document, "script", "style", with_tail=False)
         
         # Get text content
-        text = soup.get_text()
+        text = document.text_content()
         
         # Clean up text
         lines = (line.strip() for line in text.splitlines())
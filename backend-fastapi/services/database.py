@@ -1,17 +1,119 @@
 import os
+import re
+import sys
+import time
+from array import array
 from typing import Optional, Dict, Any, List
 from contextlib import asynccontextmanager
+from functools import lru_cache
 from dotenv import load_dotenv
 import json
 import uuid
+from collections import defaultdict
 from datetime import datetime
 
 load_dotenv()
 
+# Echo every mock query to stdout; off by default since it dominates mock call cost
+_DEBUG_SQL = os.getenv("ENUX_DEBUG_SQL") == "1"
+
+# Mock rows store timestamps as int nanoseconds since the epoch; these fields become datetimes on read
+_TIMESTAMP_FIELDS = frozenset({"created_at", "updated_at", "processed_at"})
+
+def _to_datetime(ns: int) -> datetime:
+    """Local naive datetime for a time.time_ns() value, as datetime.now() would have returned"""
+    seconds, remainder = divmod(ns, 1_000_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=remainder // 1000)
+
+def _with_datetimes(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a stored row with its int timestamps converted"""
+    return {
+        key: _to_datetime(value) if key in _TIMESTAMP_FIELDS and type(value) is int else value
+        for key, value in record.items()
+    }
+
+# Marks a column a block never set, so rows come back with the same keys they were stored with
+_MISSING = object()
+
+class ContentBlockStore:
+    """Columnar in-memory content_blocks table: one list per column, row dicts built on read"""
+    
+    COLUMNS = ("id", "upload_id", "type", "content", "confidence_score", "suggested_asset_type", "created_at")
+    # Low-cardinality columns kept as 2-byte codes into a per-column value table
+    ENCODED_COLUMNS = ("type", "suggested_asset_type")
+    
+    def __init__(self):
+        self.columns = {name: array("H") if name in self.ENCODED_COLUMNS else [] for name in self.COLUMNS}
+        # column -> (value -> code, code -> value)
+        self.dictionaries = {name: ({}, []) for name in self.ENCODED_COLUMNS}
+        # Per-row block fields outside COLUMNS (header, summary, keywords, ...), or None
+        self.extra = []
+        self.id_index = {}
+        # upload_id -> row indexes in insertion order
+        self.rows_by_upload = defaultdict(list)
+    
+    def __len__(self):
+        return len(self.extra)
+    
+    def append(self, record: Dict[str, Any]):
+        """Add one block row"""
+        self.extend([record])
+    
+    def extend(self, records: List[Dict[str, Any]]):
+        """Add a batch of block rows, growing each column once instead of once per row"""
+        start = len(self.extra)
+        for name, column in self.columns.items():
+            values = [record.get(name, _MISSING) for record in records]
+            if name in self.dictionaries:
+                values = self._encode(name, values)
+            column.extend(values)
+        self.extra.extend(
+            {key: value for key, value in record.items() if key not in self.columns} or None
+            for record in records
+        )
+        self.id_index.update(zip((record["id"] for record in records), range(start, start + len(records))))
+        for index, record in enumerate(records, start):
+            self.rows_by_upload[record["upload_id"]].append(index)
+    
+    def _encode(self, name: str, values: List[Any]) -> List[int]:
+        """Map values to their codes in the column's dictionary, adding new ones"""
+        codes, known = self.dictionaries[name]
+        encoded = []
+        for value in values:
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(known)
+                known.append(value)
+            encoded.append(code)
+        return encoded
+    
+    def row(self, index: int) -> Dict[str, Any]:
+        """Materialize one row as a dict"""
+        row = {}
+        for name, column in self.columns.items():
+            value = column[index]
+            if name in self.dictionaries:
+                value = self.dictionaries[name][1][value]
+            if value is not _MISSING:
+                row[name] = value
+        if self.extra[index]:
+            row.update(self.extra[index])
+        return _with_datetimes(row)
+    
+    def get(self, block_id: str) -> Optional[Dict[str, Any]]:
+        index = self.id_index.get(block_id)
+        return None if index is None else self.row(index)
+    
+    def rows_for_upload(self, upload_id: str) -> List[Dict[str, Any]]:
+        return [self.row(index) for index in self.rows_by_upload.get(upload_id, ())]
+    
+    def count_for_upload(self, upload_id: str) -> int:
+        return len(self.rows_by_upload.get(upload_id, ()))
+
 # In-memory storage for demo purposes (replace with real database later)
 _in_memory_db = {
     "uploads": {},
-    "content_blocks": {}
+    "content_blocks": ContentBlockStore()
 }
 
 class DatabaseConfig:
@@ -28,106 +130,159 @@ class DatabaseConfig:
 # Global database configuration
 db_config = DatabaseConfig()
 
+def _mock_upload_by_id(args):
+    upload = _in_memory_db["uploads"].get(args[0] if args else None)
+    return _with_datetimes(upload) if upload is not None else None
+
+def _mock_blocks_for_upload(args):
+    return _in_memory_db["content_blocks"].rows_for_upload(args[0] if args else None)
+
+def _mock_count_blocks(args):
+    return _in_memory_db["content_blocks"].count_for_upload(args[0] if args else None)
+
+def _contains_all(*fragments):
+    """Pattern that matches (from the start) any query containing every fragment"""
+    return re.compile("".join(rf"(?=[\s\S]*{re.escape(fragment)})" for fragment in fragments))
+
+# Query shapes the mock understands, per method and in priority order
+_MOCK_QUERY_HANDLERS = {
+    "fetchrow": ((_contains_all("uploads", "WHERE id"), _mock_upload_by_id),),
+    "fetch": ((_contains_all("content_blocks", "WHERE upload_id"), _mock_blocks_for_upload),),
+    "fetchval": (
+        (_contains_all("SELECT 1"), lambda args: 1),
+        (_contains_all("COUNT(*)"), _mock_count_blocks),
+    ),
+}
+
+@lru_cache(maxsize=256)
+def _mock_handler(method: str, query: str):
+    """Resolve a query's handler once; the app reuses a handful of constant query strings"""
+    for pattern, handler in _MOCK_QUERY_HANDLERS[method]:
+        if pattern.match(query):
+            return handler
+    return None
+
 class MockConnection:
     """Mock database connection for demo"""
     
     async def execute(self, query: str, *args):
         """Mock execute for CREATE/INSERT/UPDATE statements"""
-        print(f"Mock DB Execute: {query[:50]}...")
+        if _DEBUG_SQL:
+            print(f"Mock DB Execute: {query[:50]}...")
         return None
     
     async def fetchrow(self, query: str, *args):
         """Mock fetchrow for SELECT single row"""
-        print(f"Mock DB Fetchrow: {query[:50]}...")
-        
-        if "uploads" in query and "WHERE id" in query:
-            upload_id = args[0] if args else None
-            return _in_memory_db["uploads"].get(upload_id)
+        if _DEBUG_SQL:
+            print(f"Mock DB Fetchrow: {query[:50]}...")
         
-        return None
+        handler = _mock_handler("fetchrow", query)
+        return handler(args) if handler else None
     
     async def fetch(self, query: str, *args):
         """Mock fetch for SELECT multiple rows"""
-        print(f"Mock DB Fetch: {query[:50]}...")
-        
-        if "content_blocks" in query and "WHERE upload_id" in query:
-            upload_id = args[0] if args else None
-            return [block for block in _in_memory_db["content_blocks"].values() 
-                   if block.get("upload_id") == upload_id]
+        if _DEBUG_SQL:
+            print(f"Mock DB Fetch: {query[:50]}...")
         
-        return []
+        handler = _mock_handler("fetch", query)
+        return handler(args) if handler else []
     
     async def fetchval(self, query: str, *args):
         """Mock fetchval for single value"""
-        if "SELECT 1" in query:
-            return 1
-        if "COUNT(*)" in query:
-            upload_id = args[0] if args else None
-            return len([b for b in _in_memory_db["content_blocks"].values() 
-                       if b.get("upload_id") == upload_id])
-        return None
+        handler = _mock_handler("fetchval", query)
+        return handler(args) if handler else None
+
+# Shared asyncpg pool, created once by init_connection_pool()
+_connection_pool = None
+
+async def init_connection_pool():
+    """Create the shared asyncpg pool when a database URL is configured"""
+    global _connection_pool
+    if _connection_pool is None and db_config.database_url:
+        # Optional dependency: only deployments with a direct Postgres URL need asyncpg
+        import asyncpg
+        
+        # (cores * 2) + 1 connections, with a warm floor so first requests skip the handshake
+        max_size = (os.cpu_count() or 4) * 2 + 1
+        _connection_pool = await asyncpg.create_pool(
+            db_config.database_url,
+            min_size=min(max_size, max(5, max_size // 4)),
+            max_size=max_size,
+            max_inactive_connection_lifetime=300.0,
+            command_timeout=60,
+            statement_cache_size=1024,
+            server_settings={"application_name": "enux-backend", "jit": "off"}
+        )
+        print("✅ Database connection pool created")
+    return _connection_pool
 
 @asynccontextmanager
 async def get_db_connection():
-    """Get mock database connection"""
-    yield MockConnection()
-
-async def init_database():
-    """Initialize mock database"""
-    try:
-        print("✅ Mock database initialized successfully")
-        return True
-    except Exception as e:
-        print(f"❌ Database initialization failed: {e}")
-        return False
+    """Acquire a pooled connection, or the mock connection when no pool is configured"""
+    if _connection_pool is None:
+        yield MockConnection()
+    else:
+        async with _connection_pool.acquire() as conn:
+            yield conn
 
-async def close_database():
-    """Close database connections"""
-    print("✅ Database connections closed")
+def _batch_uuid4_str(count: int) -> List[str]:
+    """Generate count random UUID4 strings from a single urandom read"""
+    raw = bytearray(os.urandom(16 * count))
+    ids = []
+    for i in range(0, 16 * count, 16):
+        # Set the version (4) and RFC 4122 variant bits, as uuid.uuid4() does
+        raw[i + 6] = (raw[i + 6] & 0x0F) | 0x40
+        raw[i + 8] = (raw[i + 8] & 0x3F) | 0x80
+        h = raw[i:i + 16].hex()
+        ids.append(f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}")
+    return ids
 
 # Mock database operations
 def store_upload(upload_data: Dict[str, Any]) -> str:
     """Store upload record"""
     upload_id = str(uuid.uuid4())
+    now = time.time_ns()
     upload_record = {
         "id": upload_id,
-        "created_at": datetime.now(),
-        "updated_at": datetime.now(),
+        "created_at": now,
+        "updated_at": now,
         **upload_data
     }
+    # Status and MIME type repeat across uploads; share one string object per value
+    for field in ("status", "mime_type"):
+        if isinstance(upload_record.get(field), str):
+            upload_record[field] = sys.intern(upload_record[field])
     _in_memory_db["uploads"][upload_id] = upload_record
     print(f"✅ Stored upload: {upload_id}")
     return upload_id
 
 def update_upload_status(upload_id: str, status: str, error_message: str = None):
     """Update upload status"""
-    if upload_id in _in_memory_db["uploads"]:
-        _in_memory_db["uploads"][upload_id]["status"] = status
-        _in_memory_db["uploads"][upload_id]["updated_at"] = datetime.now()
+    upload = _in_memory_db["uploads"].get(upload_id)
+    if upload is not None:
+        now = time.time_ns()
+        upload["status"] = sys.intern(status)
+        upload["updated_at"] = now
         if error_message:
-            _in_memory_db["uploads"][upload_id]["error_message"] = error_message
+            upload["error_message"] = error_message
         if status == "completed":
-            _in_memory_db["uploads"][upload_id]["processed_at"] = datetime.now()
+            upload["processed_at"] = now
         print(f"✅ Updated upload {upload_id} status to {status}")
 
 async def store_content_blocks(upload_id: str, blocks: List[Dict[str, Any]]):
     """Store content blocks"""
-    for block in blocks:
-        block_id = str(uuid.uuid4())
-        block_record = {
+    now = time.time_ns()
+    _in_memory_db["content_blocks"].extend([
+        {
             "id": block_id,
             "upload_id": upload_id,
-            "created_at": datetime.now(),
+            "created_at": now,
             **block
         }
-        _in_memory_db["content_blocks"][block_id] = block_record
+        for block_id, block in zip(_batch_uuid4_str(len(blocks)), blocks)
+    ])
     print(f"✅ Stored {len(blocks)} content blocks for upload {upload_id}")
 
-# For backward compatibility
-async def get_db_session():
-    """Legacy method for getting database session"""
-    return MockConnection()
-
 
 async def init_database():
     """Initialize database connection and create missing tables"""
@@ -146,10 +301,12 @@ async def init_database():
                 # Try to create the main database if it doesn't exist
                 await conn.execute(f"CREATE DATABASE {db_config.name}")
                 print(f"✅ Created database: {db_config.name}")
-            except asyncpg.DuplicateDatabase:
-                print(f"ℹ️ Database {db_config.name} already exists")
             except Exception as e:
-                print(f"ℹ️ Could not create database (might already exist): {e}")
+                # SQLSTATE 42P04 is asyncpg.DuplicateDatabase, matched without importing asyncpg here
+                if getattr(e, "sqlstate", None) == "42P04":
+                    print(f"ℹ️ Database {db_config.name} already exists")
+                else:
+                    print(f"ℹ️ Could not create database (might already exist): {e}")
             
             # Create uploads table if it doesn't exist (for our upload workflow)
             await conn.execute("""
@@ -185,6 +342,7 @@ async def init_database():
             # Create indexes for better performance
             await conn.execute("CREATE INDEX IF NOT EXISTS idx_uploads_status ON uploads(status)")
             await conn.execute("CREATE INDEX IF NOT EXISTS idx_content_blocks_upload ON content_blocks(upload_id)")
+            await conn.execute("CREATE INDEX IF NOT EXISTS idx_uploads_created_at ON uploads(created_at DESC)")
             
             print("✅ Database tables created successfully")
             
@@ -201,10 +359,3 @@ async def close_database():
         await _connection_pool.close()
         _connection_pool = None
         print("✅ Database connections closed")
-
-
-# For backward compatibility
-async def get_db_session():
-    """Legacy method for getting database session - now returns connection"""
-    async with get_db_connection() as conn:
-        return conn
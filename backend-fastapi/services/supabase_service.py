@@ -6,12 +6,17 @@ Supabase service using only tables from supabase_schema.sql
 import os
 import uuid
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Max rows per bulk insert into the embeddings table
+EMBEDDING_INSERT_BATCH_SIZE = 500
+
 class SupabaseService:
     """Supabase service using only schema-defined tables"""
     
@@ -21,6 +26,16 @@ class SupabaseService:
         self.anon_key = self.key  # For compatibility with embedding storage
         self.service_key = os.getenv('SUPABASE_SERVICE_KEY')
         
+        # Pooled HTTP session so Supabase calls reuse keep-alive TCP/TLS connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32,
+                              max_retries=Retry(total=3, backoff_factor=0.2))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        # Cleared after the first failed embedded-count select, so later polls skip straight to the fallback
+        self.embedded_count_supported = True
+        
         if not self.url or not self.key:
             print("⚠️ Supabase credentials not configured")
             self.client = None
@@ -35,7 +50,7 @@ class SupabaseService:
                 }
                 
                 # Test connection
-                test_response = requests.get(
+                test_response = self.session.get(
                     f"{self.url}/rest/v1/",
                     headers=self.headers,
                     timeout=10,
@@ -60,7 +75,7 @@ class SupabaseService:
             return {"success": False, "error": "Supabase not connected"}
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.url}/rest/v1/users",
                 headers=self.headers,
                 json=user_data,
@@ -84,7 +99,7 @@ class SupabaseService:
             return {"success": False, "error": "Supabase not connected"}
         
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.url}/rest/v1/users?id=eq.{user_id}&select=*",
                 headers=self.headers,
                 timeout=10,
@@ -110,7 +125,7 @@ class SupabaseService:
             return {"success": False, "error": "Supabase not connected"}
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.url}/rest/v1/playbooks",
                 headers=self.headers,
                 json=playbook_data,
@@ -141,7 +156,7 @@ class SupabaseService:
             return {"success": False, "error": "Supabase not connected"}
         
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.url}/rest/v1/playbooks?select=*&order=created_at.desc&limit={limit}",
                 headers=self.headers,
                 timeout=10,
@@ -167,7 +182,7 @@ class SupabaseService:
             if 'id' not in file_data:
                 file_data['id'] = str(uuid.uuid4())
                 
-            response = requests.post(
+            response = self.session.post(
                 f"{self.url}/rest/v1/playbook_files",
                 headers=self.headers,
                 json=file_data,
@@ -215,7 +230,7 @@ class SupabaseService:
             return {"success": False, "error": "Supabase not connected"}
         
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.url}/rest/v1/playbook_files?id=eq.{file_id}&select=*",
                 headers=self.headers,
                 timeout=10,
@@ -234,13 +249,104 @@ class SupabaseService:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    def count_embeddings(self, file_id: str) -> Dict[str, Any]:
+        """Count a file's stored embedding rows server-side without transferring any rows"""
+        if not self.client:
+            return {"success": False, "error": "Supabase not connected"}
+        
+        try:
+            response = self.session.head(
+                f"{self.url}/rest/v1/embeddings?file_id=eq.{file_id}&select=id",
+                headers={**self.headers, "Prefer": "count=exact"},
+                timeout=10,
+                verify=False
+            )
+            
+            if response.status_code in [200, 206]:
+                total = response.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+                return {"success": True, "data": int(total) if total.isdigit() else 0}
+            else:
+                return {"success": False, "error": f"HTTP {response.status_code}"}
+                
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    def get_playbook_file_with_blockcount(self, file_id: str) -> Dict[str, Any]:
+        """Get playbook file by ID together with its stored block count, in one request when possible"""
+        if not self.client:
+            return {"success": False, "error": "Supabase not connected"}
+        
+        if self.embedded_count_supported:
+            try:
+                # Blocks are persisted as rows in embeddings; the embedded count needs the
+                # embeddings.file_id -> playbook_files.id foreign key to be visible to PostgREST
+                response = self.session.get(
+                    f"{self.url}/rest/v1/playbook_files?id=eq.{file_id}&select=*,embeddings(count)",
+                    headers=self.headers,
+                    timeout=10,
+                    verify=False
+                )
+                
+                if response.status_code == 200:
+                    data = response.json()
+                    if data:
+                        file_record = data[0]
+                        counts = file_record.pop("embeddings", None) or [{"count": 0}]
+                        file_record["blocks_extracted"] = counts[0].get("count", 0)
+                        return {"success": True, "data": file_record}
+                    else:
+                        return {"success": False, "error": "File not found"}
+                
+                self.embedded_count_supported = False
+                print(f"⚠️ Embedded block count unavailable (HTTP {response.status_code}: {response.text[:200]}); "
+                      f"using separate file and count queries from now on")
+            
+            except Exception as e:
+                print(f"⚠️ Embedded block count failed, falling back to separate queries: {e}")
+        
+        # No relationship (PostgREST answers 400) or request error: plain select plus a separate count
+        file_result = self.get_playbook_file_by_id(file_id)
+        if not file_result["success"]:
+            return file_result
+        
+        count_result = self.count_embeddings(file_id)
+        file_record = file_result["data"]
+        file_record["blocks_extracted"] = count_result["data"] if count_result["success"] else 0
+        return {"success": True, "data": file_record}
+
+    def find_playbook_file_by_sha(self, content_sha: str) -> Dict[str, Any]:
+        """Find a previously uploaded playbook file with the same content hash whose processing completed"""
+        if not self.client:
+            return {"success": False, "error": "Supabase not connected"}
+        
+        try:
+            response = self.session.get(
+                f"{self.url}/rest/v1/playbook_files?content_sha=eq.{content_sha}&select=*&order=created_at.desc&limit=5",
+                headers=self.headers,
+                timeout=10,
+                verify=False
+            )
+            
+            if response.status_code != 200:
+                return {"success": False, "error": f"HTTP {response.status_code}"}
+            
+            # playbook_files has no status column; stored embeddings are what a finished run leaves behind
+            for candidate in response.json():
+                count_result = self.count_embeddings(candidate["id"])
+                if count_result["success"] and count_result["data"] > 0:
+                    return {"success": True, "data": candidate}
+            return {"success": True, "data": None}
+                
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
     def get_all_playbook_files(self, limit: int = 10) -> Dict[str, Any]:
         """Get all playbook files"""
         if not self.client:
             return {"success": False, "error": "Supabase not connected"}
         
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.url}/rest/v1/playbook_files?select=*&order=created_at.desc&limit={limit}",
                 headers=self.headers,
                 timeout=10,
@@ -255,13 +361,36 @@ class SupabaseService:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    def count_playbook_files(self) -> Dict[str, Any]:
+        """Count playbook files server-side without transferring any rows"""
+        if not self.client:
+            return {"success": False, "error": "Supabase not connected"}
+        
+        try:
+            response = self.session.head(
+                f"{self.url}/rest/v1/playbook_files?select=id",
+                headers={**self.headers, "Prefer": "count=exact"},
+                timeout=10,
+                verify=False
+            )
+            
+            if response.status_code in [200, 206]:
+                # Content-Range looks like "0-24/25" (or "*/0" when empty)
+                total = response.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+                return {"success": True, "data": int(total) if total.isdigit() else 0}
+            else:
+                return {"success": False, "error": f"HTTP {response.status_code}"}
+                
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
     def get_files_by_playbook(self, playbook_id: str) -> Dict[str, Any]:
         """Get all files for a specific playbook"""
         if not self.client:
             return {"success": False, "error": "Supabase not connected"}
         
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.url}/rest/v1/playbook_files?playbook_id=eq.{playbook_id}&select=*&order=created_at.desc",
                 headers=self.headers,
                 timeout=10,
@@ -310,41 +439,46 @@ class SupabaseService:
         return {"success": True, "data": [{"id": str(uuid.uuid4()), "file_id": file_id, **block} for block in blocks]}
     
     def store_embeddings(self, file_id: str, blocks_with_embeddings: list):
-        """Store embeddings in the embeddings table"""
+        """Store embeddings in the embeddings table using bulk inserts"""
         print(f"💾 Storing {len(blocks_with_embeddings)} embeddings for file {file_id}")
         
+        rows = [
+            {
+                "file_id": file_id,
+                "chunk_index": i,
+                "content": block.get("content", "")[:1000],  # Limit content length
+                "embedding": block.get("embedding", []),
+                "type": "playbook"
+            }
+            for i, block in enumerate(blocks_with_embeddings)
+        ]
+        
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.service_key}",
+            "apikey": self.anon_key,
+            "Prefer": "return=minimal"
+        }
+        
+        # PostgREST accepts a JSON array per insert; chunk to keep request bodies bounded
         success_count = 0
-        for i, block in enumerate(blocks_with_embeddings):
+        for start in range(0, len(rows), EMBEDDING_INSERT_BATCH_SIZE):
+            batch = rows[start:start + EMBEDDING_INSERT_BATCH_SIZE]
             try:
-                embedding_data = {
-                    "file_id": file_id,
-                    "chunk_index": i,
-                    "content": block.get("content", "")[:1000],  # Limit content length
-                    "embedding": block.get("embedding", []),
-                    "type": "playbook"
-                }
-                
-                headers = {
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {self.service_key}",
-                    "apikey": self.anon_key,
-                    "Prefer": "return=minimal"
-                }
-                
-                response = requests.post(
+                response = self.session.post(
                     f"{self.url}/rest/v1/embeddings",
-                    json=embedding_data,
+                    json=batch,
                     headers=headers,
                     verify=False
                 )
                 
                 if response.status_code in [200, 201]:
-                    success_count += 1
+                    success_count += len(batch)
                 else:
-                    print(f"❌ Failed to store embedding {i}: {response.status_code} - {response.text}")
+                    print(f"❌ Failed to store embeddings {start}-{start + len(batch) - 1}: {response.status_code} - {response.text}")
                     
             except Exception as e:
-                print(f"❌ Error storing embedding {i}: {e}")
+                print(f"❌ Error storing embeddings {start}-{start + len(batch) - 1}: {e}")
         
         print(f"✅ Stored {success_count}/{len(blocks_with_embeddings)} embeddings")
         return {"success": True, "stored": success_count}
@@ -364,7 +498,7 @@ class SupabaseService:
                 "Prefer": "return=minimal"
             }
             
-            response = requests.patch(
+            response = self.session.patch(
                 f"{self.url}/rest/v1/playbooks?id=eq.{playbook_id}",
                 json=update_data,
                 headers=headers,
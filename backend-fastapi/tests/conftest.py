@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import the app packages (services, models, ...) the same way app_flask.py does
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,74 @@
+"""
+PDF text extraction tests
+"""
+import pytest
+
+pytest.importorskip("pypdfium2")
+content_extractor = pytest.importorskip("services.content_extractor")
+
+def _build_pdf(lines):
+    """Minimal one-page Helvetica PDF; (text, y) pairs, larger y gaps between paragraphs"""
+    stream = "BT /F1 12 Tf " + " ".join(f"1 0 0 1 72 {y} Tm ({text}) Tj" for text, y in lines) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        "/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+    ]
+
+    pdf = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return pdf.encode("latin-1")
+
+def test_pdf_text_has_unix_line_endings(tmp_path):
+    pdf_path = tmp_path / "paragraphs.pdf"
+    pdf_path.write_bytes(_build_pdf([
+        ("First paragraph opens here", 720),
+        ("and continues on this line", 706),
+        ("Second paragraph starts here", 660),
+    ]))
+
+    text = content_extractor._read_pdf_text(str(pdf_path))
+
+    assert "\r" not in text
+    assert "First paragraph opens here\n" in text
+    assert "Second paragraph starts here" in text
+
+def test_pdf_paragraphs_split_into_sections(tmp_path, monkeypatch):
+    # PDFium separates paragraphs with \r\n\r\n; they must still split like PyPDF2's \n\n did
+    class FakeTextPage:
+        def get_text_range(self):
+            return "First paragraph\r\nstill first\r\n\r\nSecond paragraph\r\n\r\nThird paragraph"
+
+    class FakePage:
+        def get_textpage(self):
+            return FakeTextPage()
+
+    class FakeDocument:
+        def __init__(self, path):
+            pass
+        def __len__(self):
+            return 1
+        def __getitem__(self, index):
+            return FakePage()
+        def close(self):
+            pass
+
+    monkeypatch.setattr(content_extractor.pdfium, "PdfDocument", FakeDocument)
+
+    text = content_extractor._read_pdf_text(str(tmp_path / "unused.pdf"))
+
+    assert content_extractor.split_into_sections(text, "pdf") == [
+        "First paragraph\nstill first",
+        "Second paragraph",
+        "Third paragraph",
+    ]